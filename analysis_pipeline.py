@@ -0,0 +1,264 @@
+"""
+Bulk scoring of positions read from a file, run with
+
+    python analysis_pipeline.py INPUT OUTPUT [--format lines|records]
+                                [--strategy KEY] [--workers N]
+                                [--executor process|thread]
+                                [--chunk-size N] [--cache-size N]
+                                [--every-ply]
+
+The positions of INPUT are read lazily, in chunks of chunk_size, and each
+chunk is scored by a pool of workers. At most max_pending chunks are in
+flight at once, and results are written as soon as every chunk before
+them is done, so OUTPUT comes in input order. The caches the strategy
+keeps between positions hold at most cache_size entries, evicting the
+oldest, so memory use does not depend on the size of INPUT either.
+
+INPUT is either text with one position per line, as print writes it
+('lines'), or a stream of game_record records ('records'), of which the
+final position is scored, or every position with every_ply. OUTPUT has
+one line per position: its score, a tab, and the position as print
+writes it.
+
+The workers of a 'thread' pool share one strategy, and so its cache; a
+'process' pool runs on several cores, with one strategy, and one cache,
+per process, kept from chunk to chunk: a position scored by one process
+is not known to the others.
+"""
+from ast import literal_eval
+from collections import deque
+from functools import partial
+import re
+from registry import load_strategy
+from transposition import TranspositionTable
+from subtract_square_state import SubtractSquareState
+from tippy_state import TippyGameState
+
+SUBTRACT_SQUARE_LINE = re.compile(r'Current total: (\d+); '
+                                  r'next player: (p[12])$')
+TIPPY_LINE = re.compile(r'Next player: (p[12]); the checkerboard looks like '
+                        r'(\[.*\])$')
+
+
+def parse_state(line):
+    """(str) -> GameState
+
+    Return the state printed as line; raise ValueError if line is not a
+    printed SubtractSquareState or TippyGameState.
+
+    >>> parse_state('Current total: 17; next player: p2').current_total
+    17
+    >>> state = parse_state("Next player: p1; the checkerboard looks like "
+    ...                     "[['p1', 'p1', 0], ['p2', 'p1', 'p2'], [0, 0, 0]]")
+    >>> state.dimension, state.over
+    (3, False)
+    """
+    line = line.strip()
+    match = SUBTRACT_SQUARE_LINE.match(line)
+    if match:
+        return SubtractSquareState(match.group(2),
+                                   current_total=int(match.group(1)))
+    match = TIPPY_LINE.match(line)
+    if not match:
+        raise ValueError('not a position: {!r}'.format(line))
+    grid = literal_eval(match.group(2))
+    state = TippyGameState(match.group(1), dimension=len(grid))
+    if (any(len(row) != len(grid) for row in grid) or
+            any(x not in (0, 'p1', 'p2') for row in grid for x in row)):
+        raise ValueError('not a grid: {!r}'.format(line))
+    state.grid = grid
+    state.over = (not any(0 in row for row in grid) or
+                  state.winner('p1') or state.winner('p2'))
+    return state
+
+
+def read_positions(source, format='lines', every_ply=False):
+    """(file, str, bool) -> generator of GameState
+
+    Yield the positions of source one at a time: a text file of printed
+    positions if format is 'lines', skipping blank lines, or a binary
+    stream of game records if format is 'records'.
+    """
+    if format == 'lines':
+        for line in source:
+            if line.strip():
+                yield parse_state(line)
+    elif format == 'records':
+        from game_record import read_records, replay
+        for record in read_records(source):
+            if every_ply:
+                for ply in range(len(record.moves) + 1):
+                    yield replay(record, ply)
+            else:
+                yield replay(record)
+    else:
+        raise ValueError('unknown format {!r}'.format(format))
+
+
+def chunks(iterable, size):
+    """(iterable, int) -> generator of list
+
+    Yield the items of iterable in lists of size, the last one shorter if
+    needed.
+
+    >>> list(chunks(range(5), 2))
+    [[0, 1], [2, 3], [4]]
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bound_caches(strategy, cache_size):
+    """(Strategy, int) -> NoneType
+
+    Replace the caches strategy keeps between positions, its memo or
+    transposition table, and those of the strategies it searches with, by
+    TranspositionTables of at most cache_size entries.
+    """
+    if hasattr(strategy, 'memo'):
+        strategy.memo = TranspositionTable(cache_size)
+    if isinstance(getattr(strategy, 'table', None), TranspositionTable):
+        strategy.table = TranspositionTable(cache_size)
+    for name in ['endgame_solver', 'fallback']:
+        if getattr(strategy, name, None) is not None:
+            bound_caches(getattr(strategy, name), cache_size)
+
+
+def bounded_strategy(key, cache_size):
+    """(str, int) -> Strategy
+
+    Return a new strategy registered as key, whose caches hold at most
+    cache_size entries.
+
+    >>> bounded_strategy('mm', 100).memo.max_size
+    100
+    """
+    strategy = load_strategy(key)()
+    bound_caches(strategy, cache_size)
+    return strategy
+
+
+def score_states(strategy, states):
+    """(Strategy, list of GameState) -> list of float
+
+    Return the score of each of states for its next player.
+    """
+    return [strategy.get_score(state) for state in states]
+
+
+# the strategy of each worker process, kept between the chunks it scores
+scorer = None
+
+
+def start_worker(key, cache_size):
+    """(str, int) -> NoneType
+
+    Create the strategy of this process, registered as key, with caches
+    of at most cache_size entries.
+    """
+    global scorer
+    scorer = bounded_strategy(key, cache_size)
+
+
+def score_chunk(states):
+    """(list of GameState) -> list of float
+
+    Return the scores of states given by the strategy of this process.
+    """
+    return score_states(scorer, states)
+
+
+def analyse(states, strategy='mm', workers=None, executor='process',
+            chunk_size=256, max_pending=None, cache_size=100000):
+    """(iterable of GameState, str, int, str, int, int, int)
+    -> generator of (GameState, float)
+
+    Yield each of states with its score, in order, as given by the
+    strategy registered as key strategy, which must have get_score. The
+    states are scored in chunks of chunk_size by workers workers (one per
+    core if None) of an executor, 'process' or 'thread', with at most
+    max_pending chunks in flight (twice the workers if None). The caches
+    of the strategy hold at most cache_size entries, in each process.
+
+    >>> states = [SubtractSquareState('p1', current_total=n)
+    ...           for n in range(6)]
+    >>> [score for state, score in analyse(states, executor='thread',
+    ...                                    workers=2, chunk_size=2)]
+    [-1.0, 1.0, -1.0, 1.0, 1.0, -1.0]
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    import os
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 2 * workers
+    if executor == 'thread':
+        shared = bounded_strategy(strategy, cache_size)
+        pool = ThreadPoolExecutor(workers)
+        submit = partial(pool.submit, score_states, shared)
+    elif executor == 'process':
+        pool = ProcessPoolExecutor(workers, initializer=start_worker,
+                                   initargs=(strategy, cache_size))
+        submit = partial(pool.submit, score_chunk)
+    else:
+        raise ValueError('unknown executor {!r}'.format(executor))
+    pending = deque()
+    with pool:
+        for chunk in chunks(states, chunk_size):
+            if len(pending) >= max_pending:
+                done, future = pending.popleft()
+                yield from zip(done, future.result())
+            pending.append((chunk, submit(chunk)))
+        while pending:
+            done, future = pending.popleft()
+            yield from zip(done, future.result())
+
+
+def main(argv=None):
+    """(list of str) -> NoneType
+
+    Score the positions of the files given by the command line argv.
+    """
+    import argparse
+    from time import perf_counter
+    parser = argparse.ArgumentParser(description='Score a file of '
+                                     'positions.')
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('--format', choices=['lines', 'records'],
+                        default='lines')
+    parser.add_argument('--strategy', default='mm',
+                        help='registry key of a strategy with get_score')
+    parser.add_argument('--workers', type=int,
+                        help='worker count (default: one per core)')
+    parser.add_argument('--executor', choices=['process', 'thread'],
+                        default='process')
+    parser.add_argument('--chunk-size', type=int, default=256)
+    parser.add_argument('--cache-size', type=int, default=100000,
+                        help='largest number of cached positions, per '
+                        'process')
+    parser.add_argument('--every-ply', action='store_true',
+                        help='score every position of each game record')
+    args = parser.parse_args(argv)
+    start, count = perf_counter(), 0
+    mode = 'r' if args.format == 'lines' else 'rb'
+    with open(args.input, mode) as source, open(args.output, 'w') as out:
+        states = read_positions(source, args.format, args.every_ply)
+        for state, score in analyse(states, args.strategy, args.workers,
+                                    args.executor, args.chunk_size,
+                                    cache_size=args.cache_size):
+            # + 0.0 prints a negated tie, -0.0, as 0.0
+            out.write('{}\t{}\n'.format(score + 0.0, state))
+            count += 1
+    print('{} positions scored in {:.1f}s'.format(count,
+                                                  perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
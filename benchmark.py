@@ -0,0 +1,174 @@
+"""
+Benchmarks of the strategies, run with
+
+    python benchmark.py
+
+Each benchmark prints one line per measurement.
+"""
+import random
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from os.path import dirname, abspath
+from time import perf_counter
+from differential import shared_strategies
+from search_control import SearchControl
+from tippy_state import TippyGameState
+from strategy_minimax_prune import StrategyMinimaxPrune
+from strategy_minimax_myopic import StrategyMinimaxMyopic
+from strategy_random import StrategyRandom
+
+
+def random_position(dimension, filled, seed):
+    """(int, int, int) -> TippyGameState
+
+    Return a TippyGameState of the given dimension, not over, reached by
+    playing filled random moves from the empty grid, chosen with seed.
+    """
+    rng = random.Random(seed)
+    while True:
+        state = TippyGameState('p1', dimension=dimension)
+        for i in range(filled):
+            state = state.apply_move(rng.choice(state.possible_next_moves()))
+            if state.over:
+                break
+        if not state.over:
+            return state
+
+
+def count_nodes(strategy, state, time_limit=None):
+    """(Strategy, GameState, float) -> (int, float, bool)
+
+    Return the number of nodes strategy visits to choose a move from state,
+    the time it takes, and whether it finished within time_limit seconds.
+    """
+    control = SearchControl(time_limit)
+    start = perf_counter()
+    move, proven = strategy.suggest_move_exhaustive(state, control)
+    return control.nodes, perf_counter() - start, proven
+
+
+def bench_prune_modes(positions=3, time_limit=10.0):
+    """(int, float) -> NoneType
+
+    Print the nodes and time of the 'prune' and 'pvs' modes of
+    StrategyMinimaxPrune on random 4x4 and 5x5 Tippy positions.
+    """
+    for dimension, filled in [(4, 5), (5, 14)]:
+        for seed in range(positions):
+            state = random_position(dimension, filled, seed)
+            for mode in ['prune', 'pvs']:
+                nodes, seconds, proven = count_nodes(
+                    StrategyMinimaxPrune(mode=mode), state, time_limit)
+                print('{}x{} seed {} {:5}: {:9} nodes {:8.2f}s{}'.format(
+                    dimension, dimension, seed, mode, nodes, seconds,
+                    '' if proven else ' (stopped)'))
+
+
+def bench_graded(positions=5, games=10):
+    """(int, int) -> NoneType
+
+    Print the nodes StrategyMinimaxMyopic visits per decision with graded
+    scores, searching each depth with and without aspiration windows, on
+    random 5x5 Tippy positions, and the average number of moves it takes
+    it to beat StrategyRandom on a 4x4 grid with and without graded
+    scores.
+    """
+    for seed in range(positions):
+        state = random_position(5, 6, seed)
+        nodes = []
+        for aspiration in [False, True]:
+            control = SearchControl()
+            strategy = StrategyMinimaxMyopic(graded=True,
+                                             aspiration=aspiration)
+            strategy.suggest_move_graded(state, control)
+            nodes.append(control.nodes)
+        print('5x5 seed {}: {:7} nodes full window, {:7} nodes '
+              'aspiration'.format(seed, *nodes))
+    for graded in [False, True]:
+        lengths = []
+        for seed in range(games):
+            random.seed(seed)
+            state = TippyGameState('p1', dimension=4)
+            players = {'p1': StrategyMinimaxMyopic(graded=graded),
+                       'p2': StrategyRandom()}
+            while not state.over:
+                move = players[state.next_player].suggest_move(state)
+                state = state.apply_move(move)
+            if state.winner('p1'):
+                lengths.append(sum([row.count('p1') for row in state.grid]))
+        print('graded={}: won {} of {} games, {:.1f} moves per win'.format(
+            graded, len(lengths), games,
+            sum(lengths) / max(len(lengths), 1)))
+
+
+def bench_concurrency(positions=40, threads=8):
+    """(int, int) -> NoneType
+
+    Print the moves per second of one strategy object suggesting moves for
+    random 4x4 Tippy positions from a pool of threads, against a fresh
+    object per position in one thread. Threads only speed the search up
+    on a free-threaded Python build. That the moves agree is checked by
+    differential.check_shared.
+    """
+    states = [random_position(4, 8, seed) for seed in range(positions)]
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    for name, make in shared_strategies():
+        start = perf_counter()
+        for state in states:
+            make().suggest_move(state)
+        serial = perf_counter() - start
+        shared = make()
+        start = perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(shared.suggest_move, states))
+        parallel = perf_counter() - start
+        print('{:8} {} threads sharing one object: {:7.1f} moves/s, one '
+              'object per move: {:7.1f} moves/s{}'.format(
+                  name, threads, positions / parallel, positions / serial,
+                  '' if gil else ' (free-threaded)'))
+
+
+# run in a fresh interpreter by bench_cold_start; prints the import time,
+# the time of the first suggest_move and the project modules loaded
+COLD_START = """
+from time import perf_counter
+start = perf_counter()
+from registry import load_game, load_strategy
+game, strategy = load_game({game!r}), load_strategy({strategy!r})
+imported = perf_counter()
+strategy().suggest_move(game('p1', **{arguments!r}))
+import sys, os
+loaded = [m for m in sys.modules if os.path.exists(m + '.py')]
+print(imported - start, perf_counter() - imported, len(loaded))
+"""
+SAMPLE_ARGUMENTS = {'s': {'current_total': 20}, 't': {'dimension': 3}}
+
+
+def bench_cold_start(game='s', strategy='mp', repeats=5):
+    """(str, str, int) -> NoneType
+
+    Print, for repeats fresh interpreters, the time to start the process,
+    to import game and strategy by their registry keys, and to get the
+    first suggest_move on a sample starting state.
+    """
+    code = COLD_START.format(game=game, strategy=strategy,
+                             arguments=SAMPLE_ARGUMENTS[game])
+    for i in range(repeats):
+        start = perf_counter()
+        output = subprocess.run([sys.executable, '-c', code],
+                                cwd=dirname(abspath(__file__)), check=True,
+                                capture_output=True, text=True).stdout
+        total = perf_counter() - start
+        imports, first_move, modules = output.split()
+        print('cold start {} {}: process {:.3f}s, imports {:.4f}s, first '
+              'move {:.4f}s, {} project modules'.format(
+                  game, strategy, total, float(imports), float(first_move),
+                  modules))
+
+
+if __name__ == '__main__':
+    bench_cold_start()
+    bench_prune_modes()
+    bench_graded()
+    bench_concurrency()
@@ -0,0 +1,744 @@
+"""
+Differential tests of the optimized engines against reference ones, run
+with
+
+    python differential.py [--seed S] [--count N] [--exhaustive]
+
+Every check compares, on one position, what a reference implementation
+computes with what an optimized one does: win detection against
+contain_tippy_by_transformations, move generation against a scan of the
+grid or of the squares, replayed game records against apply_move, and
+scores, root scores, suggested moves, anytime moves and opening book
+answers against StrategyMinimax. Positions are random positions reached
+by play, every Subtract Square total up to a limit, and with exhaustive
+every position of a 3x3 Tippy game. The strategies that threads may
+share are also checked on random 4x4 Tippy positions: one object
+suggesting moves from a pool of threads must suggest the moves of one
+object per position.
+
+A position where a check diverges is shrunk, by emptying cells or
+lowering totals while the check still diverges, and the smallest
+position found is reported with both results. The exit status is 1 if
+any check diverged.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+import random
+from game_state import GameState
+from strategy_minimax import StrategyMinimax
+from subtract_square_move import SubtractSquareMove
+from subtract_square_state import SubtractSquareState, is_pos_square
+from subtract_square_pile_move import SubtractSquarePileMove
+from subtract_square_piles_state import SubtractSquarePilesState
+from tippy_move import TippyMove
+from tippy_state import (TippyGameState, contain_tippy,
+                         contain_tippy_by_transformations)
+
+# positions with more empty cells, or larger totals, than these are not
+# searched to the end by the score and move checks
+TIPPY_SEARCH_LIMIT = 7
+TOTAL_SEARCH_LIMIT = 60
+SUBTRACT_SQUARE_GAMES = (SubtractSquareState, SubtractSquarePilesState)
+
+
+class Divergence:
+    """
+    A check whose optimized result differs from the reference one.
+
+    check: str -- the name of the check
+    state: GameState -- the smallest position found that diverges
+    expected: object -- the reference result on state
+    actual: object -- the optimized result on state
+    """
+
+    def __init__(self, check, state, expected, actual):
+        """(Divergence, str, GameState, object, object) -> NoneType
+
+        Create a new Divergence.
+        """
+        self.check, self.state = check, state
+        self.expected, self.actual = expected, actual
+
+    def __str__(self):
+        """(Divergence) -> str
+
+        Return a description of self, with a position reproducing it.
+        """
+        return '{}: {!r}\n  {}\n  expected {!r}\n  got      {!r}'.format(
+            self.check, self.state, self.state, self.expected, self.actual)
+
+
+# reference implementations
+
+def reference_over(grid):
+    """(list of lists) -> bool
+
+    Return True iff the game on grid is over: it is full or either player
+    has a tippy.
+    """
+    return (not any(0 in row for row in grid) or
+            contain_tippy_by_transformations('p1', grid) or
+            contain_tippy_by_transformations('p2', grid))
+
+
+def reference_moves(state):
+    """(GameState) -> list of Move
+
+    Return the legal moves of state, in the order possible_next_moves
+    gives them, found by scanning the grid or the squares.
+    """
+    if isinstance(state, TippyGameState):
+        return [TippyMove((i, j)) for i in range(state.dimension)
+                for j in range(state.dimension) if state.grid[i][j] == 0]
+    if isinstance(state, SubtractSquarePilesState):
+        return [SubtractSquarePileMove(pile, n)
+                for pile, total in enumerate(state.totals)
+                for n in range(total, 0, -1) if is_pos_square(n)]
+    return [SubtractSquareMove(n) for n in range(state.current_total, 0, -1)
+            if is_pos_square(n)]
+
+
+def reference_rough_outcome(state):
+    """(TippyGameState) -> float
+
+    Return the rough outcome of state, as first defined: LOSE if the
+    opponent has a tippy, WIN if a move makes one for the next player,
+    DRAW otherwise.
+    """
+    if contain_tippy_by_transformations(state.opponent(), state.grid):
+        return GameState.LOSE
+    for move in reference_moves(state):
+        grid = [row.copy() for row in state.grid]
+        grid[move.position[0]][move.position[1]] = state.next_player
+        if contain_tippy_by_transformations(state.next_player, grid):
+            return GameState.WIN
+    return GameState.DRAW
+
+
+def tippy_position(player, grid):
+    """(str, list of lists) -> TippyGameState
+
+    Return the TippyGameState with next player player and grid, whose over
+    flag is set by the reference.
+    """
+    state = TippyGameState(player, dimension=len(grid))
+    state.grid = [row.copy() for row in grid]
+    state.over = reference_over(grid)
+    return state
+
+
+def searchable(state):
+    """(GameState) -> bool
+
+    Return True iff state is small enough to be searched to the end.
+    """
+    if isinstance(state, TippyGameState):
+        return state.endgame_size() <= TIPPY_SEARCH_LIMIT
+    return state.endgame_size() <= TOTAL_SEARCH_LIMIT
+
+
+def sign(score):
+    """(float) -> float
+
+    Return WIN, DRAW or LOSE as score is positive, zero or negative.
+    """
+    return (score > 0) - (score < 0) + 0.0
+
+
+# checks: each takes a position and returns the pair (expected, actual),
+# or None if it does not apply to the position
+
+def check_contain_tippy(state):
+    """(GameState) -> tuple
+
+    Compare whether each player has a tippy.
+    """
+    if not isinstance(state, TippyGameState):
+        return None
+    return ([contain_tippy_by_transformations(p, state.grid)
+             for p in ['p1', 'p2']],
+            [contain_tippy(p, state.grid) for p in ['p1', 'p2']])
+
+
+def check_winner(state):
+    """(GameState) -> tuple
+
+    Compare the winner.
+    """
+    if not isinstance(state, TippyGameState):
+        return None
+    return ([state.over and contain_tippy_by_transformations(p, state.grid)
+             for p in ['p1', 'p2']],
+            [state.winner(p) for p in ['p1', 'p2']])
+
+
+def check_apply_move(state):
+    """(GameState) -> tuple
+
+    Compare the state reached by each move.
+    """
+    if not isinstance(state, TippyGameState) or state.over:
+        return None
+    expected, actual = [], []
+    for move in reference_moves(state):
+        grid = [row.copy() for row in state.grid]
+        grid[move.position[0]][move.position[1]] = state.next_player
+        expected.append((state.opponent(), grid, reference_over(grid)))
+        child = state.apply_move(move)
+        actual.append((child.next_player, child.grid, child.over))
+    return expected, actual
+
+
+def check_moves(state):
+    """(GameState) -> tuple
+
+    Compare the legal moves, in order.
+    """
+    if state.over:
+        return None
+    expected = [repr(move) for move in reference_moves(state)]
+    actual = [repr(move) for move in state.possible_next_moves()]
+    if actual == expected:
+        actual = [repr(move) for move, child in state.iter_next_states()]
+    return expected, actual
+
+
+def check_is_legal(state):
+    """(GameState) -> tuple
+
+    Compare is_legal on every cell and just outside the grid.
+    """
+    if not isinstance(state, TippyGameState):
+        return None
+    cells = [TippyMove((i, j)) for i in range(-1, state.dimension + 1)
+             for j in range(-1, state.dimension + 1)]
+    return ([0 <= m.position[0] < state.dimension and
+             0 <= m.position[1] < state.dimension and
+             state.grid[m.position[0]][m.position[1]] == 0 for m in cells],
+            [state.is_legal(m) for m in cells])
+
+
+def check_rough_outcome(state):
+    """(GameState) -> tuple
+
+    Compare rough_outcome.
+    """
+    if not isinstance(state, TippyGameState) or state.over:
+        return None
+    return reference_rough_outcome(state), state.rough_outcome()
+
+
+def check_batch(state):
+    """(GameState) -> tuple
+
+    Compare the rough outcome of a NumPy batch.
+    """
+    import tippy_batch
+    if (not isinstance(state, TippyGameState) or state.over or
+            not tippy_batch.available()):
+        return None
+    return ([reference_rough_outcome(state)],
+            tippy_batch.rough_outcomes([state]))
+
+
+# reference scores by str(state), so that each position is searched once
+_reference = {}
+
+
+def reference_scores(state):
+    """(GameState) -> (float, list of (str, float))
+
+    Return the score of state for the next player and the score of each
+    move from it, by repr, found by StrategyMinimax with no table.
+    """
+    key = str(state)
+    if key not in _reference:
+        minimax = StrategyMinimax()
+        if state.over:
+            _reference[key] = (minimax.get_score(state), [])
+        else:
+            scores = [(repr(move), (-1) * minimax.get_score(child))
+                      for move, child in state.iter_next_states()]
+            _reference[key] = (max([score for move, score in scores]),
+                               scores)
+    return _reference[key]
+
+
+def score_check(engine):
+    """(function) -> function
+
+    Return a check comparing the score engine(state) with the score of
+    the reference StrategyMinimax, on searchable positions.
+    """
+    def check(state):
+        if not searchable(state):
+            return None
+        return reference_scores(state)[0], engine(state)
+    return check
+
+
+def move_check(make, same_move):
+    """(function, bool) -> function
+
+    Return a check of the move suggested by the strategy make() on
+    searchable positions: it must be the move of the reference
+    StrategyMinimax if same_move, or a move of the same score otherwise.
+    """
+    def check(state):
+        if state.over or not searchable(state):
+            return None
+        best, scores = reference_scores(state)
+        move = repr(make().suggest_move(state))
+        if same_move:
+            return [m for m, score in scores if score == best][0], move
+        return best, dict(scores).get(move)
+    return check
+
+
+def root_scores_check(engine):
+    """(function) -> function
+
+    Return a check comparing the (move, score) pairs engine(state) with
+    the scores of the moves found by the reference StrategyMinimax, on
+    searchable positions.
+    """
+    def check(state):
+        if state.over or not searchable(state):
+            return None
+        return (reference_scores(state)[1],
+                [(repr(move), score) for move, score in engine(state)])
+    return check
+
+
+def anytime_check(strategy):
+    """(Strategy) -> function
+
+    Return a check of suggest_move_anytime of strategy, with no deadline,
+    on searchable positions: it must finish, with a move of the best
+    score of the reference StrategyMinimax.
+    """
+    def check(state):
+        if state.over or not searchable(state):
+            return None
+        best, scores = reference_scores(state)
+        move, finished = strategy.suggest_move_anytime(state)
+        return (best, True), (dict(scores).get(repr(move)), finished)
+    return check
+
+
+def graded_myopic_check(strategy):
+    """(StrategyMinimaxMyopic) -> function
+
+    Return a check of the score of suggest_move_graded of strategy, whose
+    endgame covers every searchable position, against the score of the
+    reference StrategyMinimax.
+    """
+    def check(state):
+        if state.over or not searchable(state):
+            return None
+        return (reference_scores(state)[0],
+                sign(strategy.suggest_move_graded(state)[1]))
+    return check
+
+
+def continuation(state):
+    """(GameState) -> list of Move
+
+    Return the moves of a game played from state to its end, chosen at
+    random but always the same for the same state.
+    """
+    rng = random.Random(str(state))
+    moves = []
+    while not state.over:
+        move = rng.choice(state.possible_next_moves())
+        moves.append(move)
+        state = state.apply_move(move)
+    return moves
+
+
+def check_replay(state):
+    """(GameState) -> tuple
+
+    Compare the states game_record.replay reaches after each ply of a
+    game played from state with the states apply_move reaches.
+    """
+    from game_record import GameRecord, replay
+    if (not isinstance(state, (SubtractSquareState, TippyGameState)) or
+            state.over):
+        return None
+    record = GameRecord(state, continuation(state))
+    expected, actual, current = [], [], state
+    for ply in range(len(record.moves) + 1):
+        if ply > 0:
+            current = current.apply_move(record.moves[ply - 1])
+        expected.append((str(current), current.over))
+        reached = replay(record, ply)
+        actual.append((str(reached), reached.over))
+    return expected, actual
+
+
+def book_check(dimension=3):
+    """(int) -> function
+
+    Return a check of OpeningBook.lookup on a book of every Tippy position
+    of the given dimension before the default number of plies, solved
+    exactly: the score must have the sign of the reference score, and the
+    move that score.
+    """
+    import os
+    from tempfile import TemporaryDirectory
+    from opening_book import (DEFAULT_PLIES, OpeningBook, build_book,
+                              write_book)
+    plies = DEFAULT_PLIES[dimension]
+    entries = build_book(dimension, plies, processes=1,
+                         exact=dimension * dimension + 1)
+    with TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'book.bin')
+        write_book(path, dimension, plies, entries)
+        book = OpeningBook(path)
+
+    def check(state):
+        if not isinstance(state, TippyGameState) or not searchable(state):
+            return None
+        found = book.lookup(state)
+        if found is None:
+            return None
+        best, scores = reference_scores(state)
+        return (best, best), (sign(found[1]), dict(scores).get(repr(found[0])))
+    return check
+
+
+def only(games, check):
+    """(type or tuple of type, function) -> function
+
+    Return check, restricted to the positions of games.
+    """
+    return lambda state: check(state) if isinstance(state, games) else None
+
+
+def build_checks():
+    """() -> list of (str, function)
+
+    Return the checks by name. The strategies whose caches are kept
+    between positions are created once, so that the checks also cover
+    stale cache entries.
+    """
+    from strategy_minimax_memoize import StrategyMinimaxMemoize
+    from strategy_minimax_prune import StrategyMinimaxPrune
+    from strategy_minimax_myopic import StrategyMinimaxMyopic
+    from strategy_proof_number import ProofNumberSolver, StrategyProofNumber
+    from subtract_square_grundy import StrategyGrundy
+    from subtract_square_solver import (SubtractSquareSolver,
+                                        StrategySubtractSquareSolver)
+    from strategy import Strategy
+    memoize = StrategyMinimaxMemoize()
+    prune = StrategyMinimaxPrune()
+    pvs = StrategyMinimaxPrune(mode='pvs')
+    graded = StrategyMinimaxPrune(mode='pvs', graded=True)
+    myopic = StrategyMinimaxMyopic(endgame=TOTAL_SEARCH_LIMIT + 1)
+    batch = StrategyMinimaxMyopic(batch=True, endgame=TOTAL_SEARCH_LIMIT + 1)
+    graded_myopic = StrategyMinimaxMyopic(endgame=TOTAL_SEARCH_LIMIT + 1,
+                                          graded=True)
+    proof = ProofNumberSolver()
+    solver = SubtractSquareSolver()
+    return [
+        ('contain_tippy', check_contain_tippy),
+        ('winner', check_winner),
+        ('apply_move', check_apply_move),
+        ('moves', check_moves),
+        ('is_legal', check_is_legal),
+        ('rough_outcome', check_rough_outcome),
+        ('batch rough_outcome', check_batch),
+        ('score memoize', score_check(memoize.get_score)),
+        ('score prune', score_check(prune.get_score)),
+        ('score pvs', score_check(pvs.get_score_pvs)),
+        ('score graded pvs',
+         score_check(lambda state: sign(graded.get_score_pvs(state)))),
+        ('score myopic endgame', score_check(myopic.get_score)),
+        ('score proof number',
+         score_check(lambda state: proof.solve(state)[0])),
+        ('score solver', only(SubtractSquareState,
+                              score_check(solver.get_score))),
+        ('score grundy', only(SUBTRACT_SQUARE_GAMES,
+                              score_check(StrategyGrundy().get_score))),
+        ('score myopic batched', score_check(
+            lambda state: batch.get_scores_batched([state])[0])),
+        ('score graded myopic', graded_myopic_check(graded_myopic)),
+        ('root_scores minimax', root_scores_check(
+            StrategyMinimax().root_scores)),
+        ('root_scores memoize', root_scores_check(memoize.root_scores)),
+        ('root_scores myopic', root_scores_check(myopic.root_scores)),
+        ('root_scores graded myopic', root_scores_check(
+            graded_myopic.root_scores)),
+        ('root_scores batched', root_scores_check(batch.root_scores)),
+        ('anytime deepening', anytime_check(Strategy())),
+        ('anytime memoize', anytime_check(memoize)),
+        ('anytime pvs', anytime_check(pvs)),
+        ('anytime graded pvs', anytime_check(graded)),
+        ('anytime myopic', anytime_check(myopic)),
+        ('replay', check_replay),
+        ('opening book', book_check()),
+        ('move memoize', move_check(StrategyMinimaxMemoize, True)),
+        ('move prune', move_check(StrategyMinimaxPrune, True)),
+        ('move pvs', move_check(lambda: StrategyMinimaxPrune(mode='pvs'),
+                                True)),
+        ('move graded pvs', move_check(
+            lambda: StrategyMinimaxPrune(mode='pvs', graded=True), False)),
+        ('move myopic endgame', only(TippyGameState, move_check(
+            lambda: StrategyMinimaxMyopic(endgame=TIPPY_SEARCH_LIMIT + 1),
+            False))),
+        ('move graded myopic', move_check(
+            lambda: StrategyMinimaxMyopic(endgame=TOTAL_SEARCH_LIMIT + 1,
+                                          graded=True), False)),
+        ('move proof number', move_check(StrategyProofNumber, False)),
+        ('move solver', only(SubtractSquareState, move_check(
+            StrategySubtractSquareSolver, False))),
+        ('move grundy', only(SUBTRACT_SQUARE_GAMES,
+                             move_check(StrategyGrundy, False))),
+    ]
+
+
+def shared_strategies():
+    """() -> list of (str, function)
+
+    Return, by name, functions creating the strategies that one object
+    may serve to several threads at once.
+    """
+    from strategy_minimax_memoize import StrategyMinimaxMemoize
+    from strategy_minimax_prune import StrategyMinimaxPrune
+    from strategy_minimax_myopic import StrategyMinimaxMyopic
+    from strategy_proof_number import StrategyProofNumber
+    return [
+        ('memoize', lambda: StrategyMinimaxMemoize()),
+        ('pvs', lambda: StrategyMinimaxPrune(mode='pvs')),
+        ('graded', lambda: StrategyMinimaxPrune(mode='pvs', graded=True)),
+        ('myopic', lambda: StrategyMinimaxMyopic(endgame=8)),
+        ('proof', lambda: StrategyProofNumber()),
+    ]
+
+
+def check_shared(states, threads=8):
+    """(list of GameState, int) -> list of Divergence
+
+    Return, for each strategy of shared_strategies, the first position of
+    states where one object suggesting moves for all of states from a pool
+    of threads suggests another move than a new object on that position
+    alone. Such a divergence depends on the order of the threads, so it is
+    not shrunk.
+
+    >>> check_shared(list(all_totals(20))[1:], threads=4)
+    []
+    """
+    divergences = []
+    for name, make in shared_strategies():
+        expected = [make().suggest_move(state) for state in states]
+        with ThreadPoolExecutor(threads) as pool:
+            moves = list(pool.map(make().suggest_move, states))
+        for state, move, alone in zip(states, moves, expected):
+            if repr(move) != repr(alone):
+                divergences.append(Divergence('shared ' + name, state,
+                                              repr(alone), repr(move)))
+                break
+    return divergences
+
+
+# positions
+
+def played_position(start, plies, rng):
+    """(GameState, int, random.Random) -> GameState
+
+    Return the position reached from start by at most plies random moves.
+    """
+    state = start
+    for i in range(plies):
+        if state.over:
+            break
+        state = state.apply_move(rng.choice(state.possible_next_moves()))
+    return state
+
+
+def random_positions(count, rng):
+    """(int, random.Random) -> generator of GameState
+
+    Yield count random positions of each game: Tippy on grids of 3 to 6,
+    Subtract Square, and Subtract Square on several piles.
+    """
+    for i in range(count):
+        dimension = rng.choice([3, 4, 5, 6])
+        size = dimension * dimension
+        start = TippyGameState(rng.choice(['p1', 'p2']), dimension=dimension)
+        yield played_position(start, rng.randrange(size - 9, size + 1), rng)
+        yield played_position(start, rng.randrange(size // 2), rng)
+        yield SubtractSquareState(rng.choice(['p1', 'p2']),
+                                  current_total=rng.randrange(1000))
+        yield SubtractSquarePilesState(
+            rng.choice(['p1', 'p2']),
+            totals=[rng.randrange(9) for j in range(rng.randrange(1, 4))])
+
+
+def all_totals(limit=TOTAL_SEARCH_LIMIT):
+    """(int) -> generator of SubtractSquareState
+
+    Yield a Subtract Square position of every total up to limit.
+    """
+    for total in range(limit + 1):
+        yield SubtractSquareState('p1', current_total=total)
+
+
+def all_tippy_positions(dimension=3):
+    """(int) -> generator of TippyGameState
+
+    Yield every position of a Tippy game of the given dimension started by
+    p1, ply by ply.
+    """
+    seen = set()
+    level = [TippyGameState('p1', dimension=dimension)]
+    while level:
+        following = []
+        for state in level:
+            yield state
+            if not state.over:
+                for move, child in state.iter_next_states():
+                    if str(child) not in seen:
+                        seen.add(str(child))
+                        following.append(child)
+        level = following
+
+
+# shrinking
+
+def smaller(state):
+    """(GameState) -> generator of GameState
+
+    Yield the positions one step smaller than state: with one cell of the
+    grid emptied, or with a lower total, smallest first.
+    """
+    if isinstance(state, TippyGameState):
+        for i in range(state.dimension):
+            for j in range(state.dimension):
+                if state.grid[i][j] != 0:
+                    grid = [row.copy() for row in state.grid]
+                    grid[i][j] = 0
+                    yield tippy_position(state.next_player, grid)
+    elif isinstance(state, SubtractSquarePilesState):
+        totals = list(state.totals)
+        for pile in range(len(totals)):
+            if len(totals) > 1:
+                yield SubtractSquarePilesState(
+                    state.next_player, totals=totals[:pile] + totals[pile + 1:])
+            for total in range(totals[pile]):
+                yield SubtractSquarePilesState(
+                    state.next_player,
+                    totals=totals[:pile] + [total] + totals[pile + 1:])
+    else:
+        for total in range(state.current_total):
+            yield SubtractSquareState(state.next_player, current_total=total)
+
+
+def evaluate(check, state):
+    """(function, GameState) -> tuple
+
+    Return the (expected, actual) results of check on state, or None if
+    check does not apply; an exception raised by check counts as a result
+    differing from every other.
+    """
+    try:
+        return check(state)
+    except Exception as error:
+        return None, 'raised {!r}'.format(error)
+
+
+def diverges(check, state):
+    """(function, GameState) -> tuple
+
+    Return the results of check on state if they differ, or None.
+    """
+    result = evaluate(check, state)
+    if result is not None and result[0] != result[1]:
+        return result
+    return None
+
+
+def shrink(check, state, result):
+    """(function, GameState, tuple) -> (GameState, tuple)
+
+    Return the smallest position found below state on which check still
+    diverges, and the results of check on it.
+    """
+    shrunk = True
+    while shrunk:
+        shrunk = False
+        for candidate in smaller(state):
+            found = diverges(check, candidate)
+            if found is not None:
+                state, result, shrunk = candidate, found, True
+                break
+    return state, result
+
+
+def run(positions, checks=None):
+    """(iterable of GameState, list of (str, function))
+    -> (dict of {str: int}, list of Divergence)
+
+    Return how many positions each check was applied to, and the first
+    divergence of each check, shrunk.
+
+    >>> counts, divergences = run(all_totals(12))
+    >>> counts['move pvs'], divergences
+    (12, [])
+    """
+    if checks is None:
+        checks = build_checks()
+    counts = {name: 0 for name, check in checks}
+    divergences = {}
+    for state in positions:
+        for name, check in checks:
+            if name in divergences:
+                continue
+            result = evaluate(check, state)
+            if result is None:
+                continue
+            counts[name] += 1
+            if result[0] != result[1]:
+                small, result = shrink(check, state, result)
+                divergences[name] = Divergence(name, small, *result)
+    return counts, list(divergences.values())
+
+
+def main(argv=None):
+    """(list of str) -> int
+
+    Run the checks on the positions given by the command line argv, print
+    a summary and every divergence, and return the exit status.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description='Compare the optimized '
+                                     'engines with the reference ones.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--count', type=int, default=50,
+                        help='random positions of each game')
+    parser.add_argument('--exhaustive', action='store_true',
+                        help='also check every 3x3 Tippy position')
+    args = parser.parse_args(argv)
+    positions = chain(random_positions(args.count, random.Random(args.seed)),
+                      all_totals())
+    if args.exhaustive:
+        positions = chain(positions, all_tippy_positions())
+    counts, divergences = run(positions)
+    rng = random.Random(args.seed)
+    shared = [played_position(TippyGameState('p1', dimension=4), 8, rng)
+              for i in range(args.count)]
+    shared = [state for state in shared if not state.over]
+    divergences.extend(check_shared(shared))
+    counts['shared strategies'] = len(shared)
+    for name, count in counts.items():
+        print('{:24} {:6} positions'.format(name, count))
+    for divergence in divergences:
+        print(divergence)
+    print('{} divergences'.format(len(divergences)))
+    return 1 if divergences else 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Compact binary records of played games.
+
+A stream holds any number of records, one after another. Each record is
+
+    MAGIC, game type byte, first player byte, varint size,
+    one varint per move, then a 0 byte that ends the record
+
+where size is the starting total of Subtract Square or the dimension of
+Tippy. A Subtract Square move is stored as the square root of the amount
+removed, and a Tippy move as row * dimension + column + 1, so that no move
+is 0 and a Tippy move fits in one byte up to dimension 11.
+"""
+from subtract_square_state import SubtractSquareState
+from subtract_square_move import SubtractSquareMove
+from tippy_state import TippyGameState
+from tippy_move import TippyMove
+from math import isqrt
+
+MAGIC = b'G'
+SUBTRACT_SQUARE, TIPPY = 1, 2
+PLAYERS = {'p1': 1, 'p2': 2}
+
+
+class GameRecordError(Exception):
+    """
+    Raised when a stream does not hold valid game records.
+    """
+
+
+def write_varint(out, n):
+    """(binary file, int) -> NoneType
+
+    Write the non-negative int n to out, seven bits per byte, least
+    significant first.
+    """
+    data = bytearray()
+    while n >= 0x80:
+        data.append((n & 0x7f) | 0x80)
+        n >>= 7
+    data.append(n)
+    out.write(data)
+
+
+def read_varint(source):
+    """(binary file) -> int
+
+    Read an int written by write_varint from source.
+
+    >>> from io import BytesIO
+    >>> out = BytesIO()
+    >>> write_varint(out, 300)
+    >>> read_varint(BytesIO(out.getvalue()))
+    300
+    """
+    result, shift = 0, 0
+    while True:
+        byte = source.read(1)
+        if not byte:
+            raise GameRecordError('record ends in the middle of a number')
+        result |= (byte[0] & 0x7f) << shift
+        if byte[0] < 0x80:
+            return result
+        shift += 7
+
+
+class GameRecord:
+    """
+    A game as its starting state and the moves played from it.
+
+    state: GameState -- the starting state
+    moves: list of Move -- the moves played, in order
+    """
+
+    def __init__(self, state, moves=None):
+        """(GameRecord, GameState, list of Move) -> NoneType
+
+        Create a GameRecord of the game starting at state.
+        """
+        self.state = state
+        self.moves = [] if moves is None else moves
+
+    def __eq__(self, other):
+        """(GameRecord, GameRecord) -> bool
+
+        Return True iff self and other record the same game.
+        """
+        return (isinstance(other, GameRecord) and
+                self.state == other.state and self.moves == other.moves)
+
+    def __repr__(self):
+        """(GameRecord) -> str
+
+        Return a string representation of GameRecord self.
+        """
+        return 'GameRecord({}, {})'.format(repr(self.state),
+                                           repr(self.moves))
+
+
+def encode_header(state):
+    """(GameState) -> (int, int)
+
+    Return the game type and size of state, which must be a starting state.
+    """
+    if isinstance(state, SubtractSquareState):
+        return SUBTRACT_SQUARE, state.current_total
+    elif isinstance(state, TippyGameState):
+        return TIPPY, state.dimension
+    raise GameRecordError('cannot record {}'.format(type(state).__name__))
+
+
+def decode_header(game, player, size):
+    """(int, str, int) -> GameState
+
+    Return the starting state of a record with header game, player, size.
+    """
+    if game == SUBTRACT_SQUARE:
+        return SubtractSquareState(player, current_total=size)
+    elif game == TIPPY:
+        return TippyGameState(player, dimension=size)
+    raise GameRecordError('unknown game type {}'.format(game))
+
+
+def encode_move(state, move):
+    """(GameState, Move) -> int
+
+    Return the positive code of move in a game starting at state.
+    """
+    if isinstance(move, SubtractSquareMove):
+        return isqrt(move.amount)
+    return move.position[0] * state.dimension + move.position[1] + 1
+
+
+def decode_move(state, code):
+    """(GameState, int) -> Move
+
+    Return the move of code in a game starting at state.
+    """
+    if isinstance(state, SubtractSquareState):
+        return SubtractSquareMove(code * code)
+    return TippyMove(divmod(code - 1, state.dimension))
+
+
+class GameRecordWriter:
+    """
+    Writes game records to a binary file as the games are played.
+
+    out: binary file -- where the records are written
+    """
+
+    def __init__(self, out):
+        """(GameRecordWriter, binary file) -> NoneType
+
+        Create a GameRecordWriter writing to out.
+        """
+        self.out = out
+        self.state = None
+
+    def begin(self, state):
+        """(GameRecordWriter, GameState) -> NoneType
+
+        Start the record of a game starting at state.
+        """
+        game, size = encode_header(state)
+        self.out.write(MAGIC + bytes([game, PLAYERS[state.next_player]]))
+        write_varint(self.out, size)
+        self.state = state
+
+    def add(self, move):
+        """(GameRecordWriter, Move) -> NoneType
+
+        Record move as the next move of the current game.
+        """
+        write_varint(self.out, encode_move(self.state, move))
+
+    def end(self):
+        """(GameRecordWriter) -> NoneType
+
+        End the record of the current game.
+        """
+        self.out.write(b'\x00')
+        self.state = None
+
+    def write(self, record):
+        """(GameRecordWriter, GameRecord) -> NoneType
+
+        Write the whole of record.
+        """
+        self.begin(record.state)
+        for move in record.moves:
+            self.add(move)
+        self.end()
+
+
+def read_records(source):
+    """(binary file) -> generator of GameRecord
+
+    Yield the records of source one at a time, so that a stream of any
+    length is read in constant memory.
+
+    >>> from io import BytesIO
+    >>> out = BytesIO()
+    >>> record = GameRecord(TippyGameState('p1', dimension=4),
+    ...                     [TippyMove((1, 2)), TippyMove((3, 3))])
+    >>> GameRecordWriter(out).write(record)
+    >>> len(out.getvalue())
+    7
+    >>> list(read_records(BytesIO(out.getvalue()))) == [record]
+    True
+    """
+    players = {code: player for player, code in PLAYERS.items()}
+    while True:
+        header = source.read(3)
+        if not header:
+            return
+        if len(header) < 3 or header[:1] != MAGIC or header[2] not in players:
+            raise GameRecordError('invalid record header')
+        state = decode_header(header[1], players[header[2]],
+                              read_varint(source))
+        moves = []
+        code = read_varint(source)
+        while code != 0:
+            moves.append(decode_move(state, code))
+            code = read_varint(source)
+        yield GameRecord(state, moves)
+
+
+def replay(record, ply=None):
+    """(GameRecord, int) -> GameState
+
+    Return the state reached after the first ply moves of record, or after
+    all of them if ply is None. The moves are trusted to be legal, so the
+    state is built directly instead of through apply_move.
+
+    >>> record = GameRecord(SubtractSquareState('p1', current_total=20),
+    ...                     [SubtractSquareMove(16), SubtractSquareMove(4)])
+    >>> print(replay(record, 1))
+    Current total: 4; next player: p2
+    """
+    start = record.state
+    moves = record.moves if ply is None else record.moves[:ply]
+    player = start.next_player if len(moves) % 2 == 0 else start.opponent()
+    if isinstance(start, SubtractSquareState):
+        total = start.current_total - sum([m.amount for m in moves])
+        return SubtractSquareState(player, current_total=total)
+    result = start.__class__(player, dimension=start.dimension)
+    result.grid = [row.copy() for row in start.grid]
+    mover = start.next_player
+    for move in moves:
+        result.grid[move.position[0]][move.position[1]] = mover
+        mover = 'p2' if mover == 'p1' else 'p1'
+    if moves:
+        last = moves[-1].position
+        result.over = (not any(0 in row for row in result.grid) or
+                       result.pattern_index().completes(
+                           result.opponent(), result.grid, last))
+    return result
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
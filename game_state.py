@@ -75,6 +75,39 @@ class GameState:
         '''
         raise NotImplementedError('Method must be implemented in a subclass')
 
+    def iter_next_moves(self):
+        ''' (GameState) -> generator of Move
+
+        Yield the moves that are legal from the present state one at a
+        time, in the order of possible_next_moves.
+        '''
+        for move in self.possible_next_moves():
+            yield move
+
+    def iter_next_states(self):
+        ''' (GameState) -> generator of (Move, GameState)
+
+        Yield each legal move with the state it leads to, one at a time,
+        so that a search can stop before the later states are built.
+        '''
+        for move in self.iter_next_moves():
+            yield move, self.apply_move(move)
+
+    def is_legal(self, move):
+        ''' (GameState, Move) -> bool
+
+        Return whether move is legal from the present state.
+        '''
+        return move in self.possible_next_moves()
+
+    def endgame_size(self):
+        ''' (GameState) -> int
+
+        Return a measure of how much of the game is left, small enough
+        in the endgame for an exact search, or None if unknown.
+        '''
+        return None
+
     def outcome(self):
         ''' (GameState) -> float
 
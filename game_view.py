@@ -1,15 +1,21 @@
+from threading import Thread
+from search_control import SearchControl
+
+
 class GameView:
     '''
     A game view for a two-player, sequential move, zero-sum,
     perfect-information game.
     '''
 
-    def __init__(self, state, strategy):
+    def __init__(self, state, strategy, ponder=False, profiler=None):
         '''(GameView, GameState.__class__,
-            Strategy.__class__) -> NoneType
+            Strategy.__class__, bool, MoveProfiler) -> NoneType
 
         Create GameView self for game described by state, where
-        computer uses given strategy.
+        computer uses given strategy. If ponder, the computer searches
+        the replies to the human's possible moves while waiting for input.
+        If profiler is not None, it profiles the moves of the computer.
         '''
         player = input('Type c if you wish the computer to play first ')
         if player == 'c':
@@ -18,6 +24,31 @@ class GameView:
             p = 'p1'
         self.state = state(p, interactive=True)
         self.strategy = strategy(interactive=True)
+        self.ponder = ponder
+        self.ponder_control, self.ponder_thread = None, None
+        self.profiler = profiler
+
+    def start_pondering(self):
+        '''(GameView) -> NoneType
+
+        Start pondering on self.state in the background thread
+        self.ponder_thread, which self.ponder_control stops.
+        '''
+        self.ponder_control = SearchControl()
+        self.ponder_thread = Thread(target=self.strategy.ponder,
+                                    args=(self.state, self.ponder_control),
+                                    daemon=True)
+        self.ponder_thread.start()
+
+    def stop_pondering(self):
+        '''(GameView) -> NoneType
+
+        Stop the pondering started by start_pondering and wait for it to
+        finish.
+        '''
+        self.ponder_control.cancel()
+        self.ponder_thread.join()
+        self.ponder_control, self.ponder_thread = None, None
 
     def play(self):
         ''' (GameView) -> NoneType
@@ -29,6 +60,8 @@ class GameView:
         print()
         while not self.state.over:
             if self.state.next_player == 'p1':
+                if self.ponder:
+                    self.start_pondering()
                 m = self.state.get_move()
                 while not m in self.state.possible_next_moves():
                     # The move was illegal.
@@ -36,11 +69,23 @@ class GameView:
                     print(self.state.instructions)
                     print(self.state)
                     m = self.state.get_move()
+                if self.ponder:
+                    self.stop_pondering()
                 print('You choose: {}'.format(m))
             else:
                 # The computer makes a move.
-                m = self.strategy.suggest_move(self.state)
+                hits, misses = self.strategy.cache_stats()
+                if self.profiler is None:
+                    m = self.strategy.suggest_move(self.state)
+                else:
+                    m = self.profiler.profile_move(self.strategy, self.state)
                 print('The computer chooses: {}'.format(m))
+                if self.ponder:
+                    new_hits, new_misses = self.strategy.cache_stats()
+                    lookups = new_hits - hits + new_misses - misses
+                    if lookups > 0:
+                        print('Cache hit rate: {:.1%}'.format(
+                            (new_hits - hits) / lookups))
             self.state = self.state.apply_move(m)
             print('New game state: ', str(self.state))
             print()
@@ -56,24 +101,25 @@ class GameView:
 
 
 if __name__ == '__main__':
-    from subtract_square_state import SubtractSquareState
-    from tippy_state import TippyGameState
-    game_state = ({'s': SubtractSquareState, 't': TippyGameState,})
-    from strategy_random import StrategyRandom
-    from strategy_minimax import StrategyMinimax
-    from strategy_minimax_memoize import StrategyMinimaxMemoize
-    from strategy_minimax_prune import StrategyMinimaxPrune
-    from strategy_minimax_myopic import StrategyMinimaxMyopic
-    strategy = ({'r': StrategyRandom, 'm': StrategyMinimax,
-                 'mm': StrategyMinimaxMemoize,
-                 'mp': StrategyMinimaxPrune,
-                 'my': StrategyMinimaxMyopic})
+    from registry import GAMES, STRATEGIES, load_game, load_strategy
     g = ''
-    while not g in game_state.keys():
-        g = input('s to play Subtract Square, t to play Tippy: ')
+    while not g in GAMES.keys():
+        g = input('s to play Subtract Square, t to play Tippy, '
+                  'p to play Subtract Square on several piles: ')
     s = ''
-    while not s in strategy.keys():
+    while not s in STRATEGIES.keys():
         s = input('r for random strategy ,m for minimax '
                   'strategy, mm for minimax memoize, '
-                  'mp for minimax prune, my for minimax myopic:')
-    GameView(game_state[g], strategy[s]).play()
+                  'mp for minimax prune, my for minimax myopic, '
+                  'pn for proof number, bk for opening book, '
+                  'g for Grundy values (Subtract Square only), '
+                  'ss for the Subtract Square solver (one pile only):')
+    ponder = input('Type p if you wish the computer to think during '
+                   'your turn ') == 'p'
+    profile = input('Type hooks or cprofile to profile the computer\'s '
+                    'moves into the directory profile ')
+    profiler = None
+    if profile in ('hooks', 'cprofile'):
+        from profiling import MoveProfiler
+        profiler = MoveProfiler(profile)
+    GameView(load_game(g), load_strategy(s), ponder, profiler).play()
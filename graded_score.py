@@ -0,0 +1,160 @@
+"""
+Graded scores, which tell quick wins from slow ones.
+
+A position whose next player will lose after ply more moves, with best
+play, scores -(MATE - ply), and one they will win that way MATE - ply, so
+that a search prefers faster wins and slower losses. Estimates lie in
+[-HEURISTIC_SCALE, HEURISTIC_SCALE], below every proven win and above
+every proven loss; a tie scores 0. An estimate is mostly rough_outcome,
+graded within each of its outcomes by how many more winning shapes the
+next player than the opponent could still complete.
+
+A search scores positions relative to its root, where ply counts the
+moves from the root. Transposition tables store scores relative to the
+position instead, with to_table and from_table, so that an entry is
+valid wherever the position is met.
+"""
+MATE = 1000.0
+HEURISTIC_SCALE = 100.0
+FULL_WINDOW = (-MATE, MATE)
+# half width of the aspiration windows: wide enough for a proven score to
+# move by a few plies, narrow enough to hold only the estimates close to
+# the guess, less than one outcome of rough_outcome wide
+ASPIRATION_DELTA = HEURISTIC_SCALE / 5
+
+
+def terminal_score(state, ply):
+    """(GameState, int) -> float
+
+    Return the graded score, for the next player, of state, which is
+    over, ply moves from the root.
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> terminal_score(SubtractSquareState('p1', current_total=0), 3)
+    -997.0
+    """
+    if state.winner(state.next_player):
+        return MATE - ply
+    elif state.winner(state.opponent()):
+        return ply - MATE
+    else:
+        return 0.0
+
+
+def shape_balance(state):
+    """(GameState) -> float
+
+    Return, in [-1, 1], how much closer the next player of state is than
+    the opponent to completing a winning shape, counting for each player
+    the placements of the shapes that hold only their placeholders and
+    empty cells, doubled for each placeholder already there. Games
+    without shapes are balanced, at 0.
+
+    >>> from tippy_state import TippyGameState
+    >>> state = TippyGameState('p1', dimension=3)
+    >>> state.grid = [['p1', 'p1', 0], [0, 0, 'p2'], [0, 0, 0]]
+    >>> round(shape_balance(state), 3)
+    0.167
+    """
+    if not hasattr(state, 'pattern_index'):
+        return 0.0
+    index = state.pattern_index()
+    mine = index.open_counts(state.next_player, state.grid)
+    theirs = index.open_counts(state.opponent(), state.grid)
+    mine = sum([count << filled for filled, count in enumerate(mine)])
+    theirs = sum([count << filled for filled, count in enumerate(theirs)])
+    if mine + theirs == 0:
+        return 0.0
+    return (mine - theirs) / (mine + theirs)
+
+
+def heuristic_score(state):
+    """(GameState) -> float
+
+    Return the graded estimate of state for the next player: rough_outcome
+    places it in the upper, middle or lower third of [-HEURISTIC_SCALE,
+    HEURISTIC_SCALE], and shape_balance within that third.
+
+    >>> from tippy_state import TippyGameState
+    >>> state = TippyGameState('p1', dimension=3)
+    >>> state.grid = [['p1', 'p1', 0], [0, 0, 'p2'], [0, 0, 0]]
+    >>> round(heuristic_score(state), 1)
+    5.6
+    """
+    return ((2 * state.rough_outcome() + shape_balance(state)) *
+            HEURISTIC_SCALE / 3)
+
+
+def is_decisive(score):
+    """(float) -> bool
+
+    Return True iff score is a proven win or loss.
+
+    >>> is_decisive(MATE - 7), is_decisive(HEURISTIC_SCALE)
+    (True, False)
+    """
+    return abs(score) > HEURISTIC_SCALE
+
+
+def to_outcome(score):
+    """(float) -> float
+
+    Return the outcome, 1.0, 0.0 or -1.0 as in GameState.outcome, of the
+    graded score of a solved position.
+
+    >>> to_outcome(MATE - 7), to_outcome(0.0), to_outcome(7 - MATE)
+    (1.0, 0.0, -1.0)
+    """
+    return (score > 0) - (score < 0) + 0.0
+
+
+def to_table(score, ply):
+    """(float, int) -> float
+
+    Return score, found ply moves from the root, relative to its position.
+    """
+    if score > HEURISTIC_SCALE:
+        return score + ply
+    elif score < -HEURISTIC_SCALE:
+        return score - ply
+    return score
+
+
+def from_table(score, ply):
+    """(float, int) -> float
+
+    Return score, stored by to_table, relative to a root ply moves away.
+
+    >>> from_table(to_table(MATE - 5, 2), 4)
+    993.0
+    """
+    if score > HEURISTIC_SCALE:
+        return score - ply
+    elif score < -HEURISTIC_SCALE:
+        return score + ply
+    return score
+
+
+def aspiration_search(search, guess, delta):
+    """(function, float, float) -> object
+
+    Return search(alpha, beta) for the window (guess - delta, guess +
+    delta), searched again with the window widened to MATE on the side
+    where the result falls outside it, or search(*FULL_WINDOW) if guess
+    is None. search must return a pair whose second item is the
+    fail-soft score found.
+    """
+    if guess is None:
+        return search(*FULL_WINDOW)
+    alpha, beta = max(guess - delta, -MATE), min(guess + delta, MATE)
+    result = search(alpha, beta)
+    if result[1] <= alpha and alpha > -MATE:
+        result = search(-MATE, result[1] + 1)
+    elif result[1] >= beta and beta < MATE:
+        result = search(result[1] - 1, MATE)
+    return result
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
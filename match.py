@@ -0,0 +1,105 @@
+"""
+Matches between two strategies, without a human, run with
+
+    python match.py GAME FIRST SECOND [--games N] [--dimension D]
+                    [--total T] [--piles T ...]
+                    [--profile hooks|cprofile] [--output DIR]
+
+where GAME, FIRST and SECOND are registry keys, such as t, mp and r.
+FIRST plays p1 and SECOND plays p2; with --profile, the moves of both are
+profiled by one MoveProfiler writing into DIR.
+"""
+import argparse
+from registry import GAMES, STRATEGIES, load_game, load_strategy
+
+
+def play_game(state, players, profiler=None):
+    """(GameState, dict of {str: Strategy}, MoveProfiler) -> GameState
+
+    Return the final state of the game from state, where players maps
+    each player to its strategy; profiler, if not None, profiles every
+    move.
+
+    >>> from subtract_square_state import SubtractSquareState
+    >>> from strategy_minimax_prune import StrategyMinimaxPrune
+    >>> players = {'p1': StrategyMinimaxPrune(), 'p2': StrategyMinimaxPrune()}
+    >>> end = play_game(SubtractSquareState('p1', current_total=8), players)
+    >>> end.winner('p1')
+    True
+    """
+    while not state.over:
+        strategy = players[state.next_player]
+        if profiler is None:
+            move = strategy.suggest_move(state)
+        else:
+            move = profiler.profile_move(strategy, state)
+        state = state.apply_move(move)
+    return state
+
+
+def play_match(game, first, second, games=1, profiler=None, **arguments):
+    """(GameState.__class__, Strategy, Strategy, int, MoveProfiler, object)
+    -> dict of {str: int}
+
+    Return the number of wins of p1 and p2 and of ties in games games of
+    game, each starting from game('p1', **arguments), with first playing
+    p1 and second playing p2.
+    """
+    results = {'p1': 0, 'p2': 0, 'tie': 0}
+    players = {'p1': first, 'p2': second}
+    for i in range(games):
+        state = play_game(game('p1', **arguments), players, profiler)
+        if state.winner('p1'):
+            results['p1'] += 1
+        elif state.winner('p2'):
+            results['p2'] += 1
+        else:
+            results['tie'] += 1
+    return results
+
+
+def main(argv=None):
+    """(list of str) -> NoneType
+
+    Play the match described by the command line argv.
+    """
+    parser = argparse.ArgumentParser(description='Play a match between '
+                                     'two strategies.')
+    parser.add_argument('game', choices=sorted(GAMES))
+    parser.add_argument('first', choices=sorted(STRATEGIES))
+    parser.add_argument('second', choices=sorted(STRATEGIES))
+    parser.add_argument('--games', type=int, default=1)
+    parser.add_argument('--dimension', type=int,
+                        help='the size of the Tippy grid')
+    parser.add_argument('--total', type=int,
+                        help='the starting total of Subtract Square')
+    parser.add_argument('--piles', type=int, nargs='+',
+                        help='the starting totals of Subtract Square on '
+                        'several piles')
+    parser.add_argument('--profile', choices=['hooks', 'cprofile'])
+    parser.add_argument('--output', default='profile',
+                        help='the directory of the profiles')
+    args = parser.parse_args(argv)
+    arguments = {}
+    if args.dimension is not None:
+        arguments['dimension'] = args.dimension
+    if args.total is not None:
+        arguments['current_total'] = args.total
+    if args.piles is not None:
+        arguments['totals'] = tuple(args.piles)
+    game = load_game(args.game)
+    first = load_strategy(args.first)()
+    second = load_strategy(args.second)()
+    profiler = None
+    if args.profile is not None:
+        from profiling import MoveProfiler
+        profiler = MoveProfiler(args.profile, args.output)
+    results = play_match(game, first, second, args.games, profiler,
+                         **arguments)
+    print('p1 ({}) won {}, p2 ({}) won {}, {} tied'.format(
+        args.first, results['p1'], args.second, results['p2'],
+        results['tie']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,399 @@
+"""
+Opening books for Tippy, built offline and answered without a search.
+
+Every game starts from the empty grid, so the positions of the first few
+plies are the same in every game, and they are the most expensive to
+search. build_book searches every position up to some number of plies
+once, in parallel over a pool of processes, and write_book stores the
+results in a compact binary file; StrategyBook answers from that file
+before it searches. Build the default book of a dimension with
+
+    python opening_book.py DIMENSION [--plies K] [--processes N]
+
+A position is stored under a key that does not depend on the players'
+names nor on the symmetries of the grid: each cell is a base 3 digit,
+1 for a placeholder of the next player and 2 for one of their opponent,
+and the key is the least such number over the 8 rotations and
+reflections of the grid. The winning shapes are closed under those
+symmetries, so the positions sharing a key share their score.
+
+A book file is
+
+    MAGIC, dimension byte, plies byte, uint32 count,
+    count entries sorted by key, each a uint64 key, the cell of the best
+    move in the orientation of the key (row * dimension + column) and the
+    graded score of the position for the next player as an int16
+
+all little-endian.
+"""
+from array import array
+from bisect import bisect_left
+import os
+import struct
+from strategy import Strategy
+from tippy_state import TippyGameState
+from tippy_move import TippyMove
+from tippy_pattern import SHAPES
+
+MAGIC = b'TBK1'
+HEADER = struct.Struct('<4sBBI')
+ENTRY = struct.Struct('<QBh')
+DEFAULT_PLIES = {3: 8, 4: 3, 5: 2, 6: 2}
+
+
+class OpeningBookError(Exception):
+    """
+    Raised when a file does not hold a valid opening book.
+    """
+
+
+def symmetries(dimension):
+    """(int) -> list of list of int
+
+    Return the 8 rotations and reflections of a grid of the given
+    dimension, each as a list mapping every cell to the cell it moves to.
+
+    >>> symmetries(2)[:3]
+    [[0, 1, 2, 3], [1, 0, 3, 2], [2, 3, 0, 1]]
+    """
+    last = dimension - 1
+    result = []
+    for transpose in [False, True]:
+        for flip_rows in [False, True]:
+            for flip_columns in [False, True]:
+                permutation = []
+                for i in range(dimension):
+                    for j in range(dimension):
+                        row, col = (j, i) if transpose else (i, j)
+                        if flip_rows:
+                            row = last - row
+                        if flip_columns:
+                            col = last - col
+                        permutation.append(row * dimension + col)
+                result.append(permutation)
+    return result
+
+
+def cells(state):
+    """(TippyGameState) -> list of int
+
+    Return the cells of state row by row, 1 for the next player, 2 for the
+    opponent and 0 when empty.
+    """
+    values = {0: 0, state.next_player: 1, state.opponent(): 2}
+    return [values[x] for row in state.grid for x in row]
+
+
+def canonical(state):
+    """(TippyGameState) -> (int, list of int)
+
+    Return the key of state and the symmetry bringing state to the
+    orientation of the key.
+
+    >>> s1 = TippyGameState('p1').apply_move(TippyMove((0, 0)))
+    >>> s2 = TippyGameState('p1').apply_move(TippyMove((2, 2)))
+    >>> canonical(s1)[0] == canonical(s2)[0]
+    True
+    """
+    values = cells(state)
+    best = None
+    for permutation in symmetries(state.dimension):
+        key = 0
+        for cell, value in enumerate(values):
+            if value:
+                key += value * 3 ** permutation[cell]
+        if best is None or key < best[0]:
+            best = (key, permutation)
+    return best
+
+
+def decode(key, dimension):
+    """(int, int) -> TippyGameState
+
+    Return the position of key, not over, with 'p1' to move.
+
+    >>> decode(5, 3).grid
+    [['p2', 'p1', 0], [0, 0, 0], [0, 0, 0]]
+    """
+    state = TippyGameState('p1', dimension=dimension)
+    names = [0, 'p1', 'p2']
+    for cell in range(dimension * dimension):
+        key, value = divmod(key, 3)
+        state.grid[cell // dimension][cell % dimension] = names[value]
+    return state
+
+
+def positions(dimension, plies):
+    """(int, int) -> list of int
+
+    Return the sorted keys of every position, not over, reached from the
+    empty grid in fewer than plies moves.
+
+    >>> len(positions(3, 2))
+    4
+    """
+    level = {canonical(TippyGameState('p1', dimension=dimension))[0]}
+    keys = set()
+    for ply in range(plies):
+        keys |= level
+        following = set()
+        for key in level:
+            for move, state in decode(key, dimension).iter_next_states():
+                if not state.over:
+                    following.add(canonical(state)[0])
+        level = following
+    return sorted(keys)
+
+
+# the searcher of each worker process, kept between the positions it solves
+searcher = None
+
+
+def start_worker(depth, exact):
+    """(int, int) -> NoneType
+
+    Create the searcher of this process: a graded StrategyMinimaxMyopic
+    looking depth moves ahead and solving positions with fewer than exact
+    empty cells exactly.
+    """
+    global searcher
+    from strategy_minimax_myopic import StrategyMinimaxMyopic
+    searcher = StrategyMinimaxMyopic(endgame=exact, graded=True, depth=depth)
+
+
+def solve(job):
+    """((int, int)) -> (int, int, int)
+
+    Return the key, best cell and graded score of the position of job, a
+    (key, dimension) pair.
+    """
+    key, dimension = job
+    move, score = searcher.suggest_move_graded(decode(key, dimension))
+    row, col = move.position
+    return key, row * dimension + col, round(score)
+
+
+def build_book(dimension, plies, processes=None, depth=3, exact=10,
+               chunksize=8):
+    """(int, int, int, int, int, int) -> list of (int, int, int)
+
+    Return the sorted entries (key, cell, score) of every position reached
+    in fewer than plies moves on a grid of the given dimension, searched
+    depth moves ahead, or exactly once fewer than exact cells are empty,
+    by processes worker processes (one per core if None).
+
+    >>> build_book(3, 1, processes=1)
+    [(0, 4, 991)]
+    """
+    from multiprocessing import Pool
+    jobs = [(key, dimension) for key in positions(dimension, plies)]
+    with Pool(processes, start_worker, (depth, exact)) as pool:
+        return sorted(pool.imap_unordered(solve, jobs, chunksize))
+
+
+def write_book(path, dimension, plies, entries):
+    """(str, int, int, list of (int, int, int)) -> NoneType
+
+    Write the book of entries, sorted by key, to path.
+    """
+    with open(path, 'wb') as out:
+        out.write(HEADER.pack(MAGIC, dimension, plies, len(entries)))
+        for entry in entries:
+            out.write(ENTRY.pack(*entry))
+
+
+class OpeningBook:
+    """
+    An opening book read from a file, answering by binary search.
+
+    dimension: int -- the dimension of the grid of its positions
+    plies: int -- the book holds every position before ply plies
+    keys: array of int -- the keys, sorted
+    moves: bytes -- moves[i] is the best cell for keys[i]
+    scores: array of int -- scores[i] is the graded score for keys[i]
+    """
+
+    def __init__(self, path):
+        """(OpeningBook, str) -> NoneType
+
+        Read the book at path; raise OpeningBookError if it is not one.
+        """
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < HEADER.size:
+            raise OpeningBookError('{} is too short'.format(path))
+        magic, self.dimension, self.plies, count = HEADER.unpack_from(data)
+        if magic != MAGIC or len(data) != HEADER.size + count * ENTRY.size:
+            raise OpeningBookError('{} is not an opening book'.format(path))
+        self.keys, self.scores = array('Q'), array('h')
+        moves = bytearray()
+        for key, cell, score in ENTRY.iter_unpack(data[HEADER.size:]):
+            self.keys.append(key)
+            moves.append(cell)
+            self.scores.append(score)
+        self.moves = bytes(moves)
+
+    def __len__(self):
+        """(OpeningBook) -> int
+
+        Return the number of positions in self.
+        """
+        return len(self.keys)
+
+    def lookup(self, state):
+        """(OpeningBook, TippyGameState) -> (TippyMove, int)
+
+        Return the best move from state and its graded score, or None if
+        state is not in self.
+        """
+        if (state.dimension != self.dimension or state.over or
+                type(state).SHAPES is not SHAPES):
+            return None
+        key, permutation = canonical(state)
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        cell = permutation.index(self.moves[i])
+        return (TippyMove(divmod(cell, self.dimension)), self.scores[i])
+
+
+def book_path(dimension):
+    """(int) -> str
+
+    Return the path of the default book for grids of dimension.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'tippy_book_{}.bin'.format(dimension))
+
+
+class StrategyBook(Strategy):
+    """
+    Interface to suggest moves from an opening book, and from another
+    strategy once the game leaves the book.
+
+    fallback: Strategy -- the strategy used outside the book
+    books: dict of {int: OpeningBook} -- the books loaded, by dimension,
+                                         None for a dimension without one
+    """
+
+    def __init__(self, interactive=False, fallback=None, books=None):
+        """(StrategyBook, bool, Strategy, dict) -> NoneType
+
+        Create new StrategyBook (self), prompt user if interactive. The
+        book of a dimension is read from book_path on first use, unless
+        books gives it; fallback defaults to StrategyMinimaxMyopic.
+        """
+        if fallback is None:
+            from strategy_minimax_myopic import StrategyMinimaxMyopic
+            fallback = StrategyMinimaxMyopic()
+        self.fallback = fallback
+        self.books = {} if books is None else dict(books)
+
+    def book(self, dimension):
+        """(StrategyBook, int) -> OpeningBook
+
+        Return the book for grids of dimension, or None if there is none.
+        """
+        if dimension not in self.books:
+            path = book_path(dimension)
+            self.books[dimension] = (OpeningBook(path)
+                                     if os.path.exists(path) else None)
+        return self.books[dimension]
+
+    def lookup(self, state):
+        """(StrategyBook, GameState) -> (Move, int)
+
+        Return the book move from state and its score, or None.
+        """
+        if not isinstance(state, TippyGameState):
+            return None
+        book = self.book(state.dimension)
+        return None if book is None else book.lookup(state)
+
+    def root_score(self, state, move, control=None):
+        """(StrategyBook, GameState, Move, SearchControl) -> float
+
+        Return the score of move given by self.fallback.
+
+        Overrides Strategy.root_score
+        """
+        return self.fallback.root_score(state, move, control)
+
+    def suggest_move_anytime(self, state, control=None):
+        """(StrategyBook, GameState, SearchControl) -> (Move, bool)
+
+        Return the book move, which is final, or the move of self.fallback.
+
+        Overrides Strategy.suggest_move_anytime
+        """
+        found = self.lookup(state)
+        if found is not None:
+            return found[0], True
+        return self.fallback.suggest_move_anytime(state, control)
+
+    def ponder(self, state, control):
+        """(StrategyBook, GameState, SearchControl) -> NoneType
+
+        Ponder with self.fallback.
+
+        Overrides Strategy.ponder
+        """
+        self.fallback.ponder(state, control)
+
+    def cache_stats(self):
+        """(StrategyBook) -> (int, int)
+
+        Return the cache stats of self.fallback.
+
+        Overrides Strategy.cache_stats
+        """
+        return self.fallback.cache_stats()
+
+    def suggest_move(self, state):
+        """(StrategyBook, GameState) -> Move
+
+        Return the book move from state, or the move of self.fallback if
+        state is not in the book.
+
+        Overrides Strategy.suggest_move
+        """
+        found = self.lookup(state)
+        if found is not None:
+            return found[0]
+        return self.fallback.suggest_move(state)
+
+
+def main(argv=None):
+    """(list of str) -> NoneType
+
+    Build the book described by the command line argv.
+    """
+    import argparse
+    from time import perf_counter
+    parser = argparse.ArgumentParser(description='Build a Tippy opening '
+                                     'book.')
+    parser.add_argument('dimension', type=int, choices=sorted(DEFAULT_PLIES))
+    parser.add_argument('--plies', type=int,
+                        help='book positions before this ply (default '
+                        'depends on dimension)')
+    parser.add_argument('--processes', type=int,
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--depth', type=int, default=3,
+                        help='moves searched ahead of each position')
+    parser.add_argument('--exact', type=int, default=10,
+                        help='solve exactly below this many empty cells')
+    parser.add_argument('--output', help='the book file (default: '
+                        'tippy_book_DIMENSION.bin next to this module)')
+    args = parser.parse_args(argv)
+    plies = args.plies or DEFAULT_PLIES[args.dimension]
+    path = args.output or book_path(args.dimension)
+    start = perf_counter()
+    entries = build_book(args.dimension, plies, args.processes, args.depth,
+                         args.exact)
+    write_book(path, args.dimension, plies, entries)
+    print('{} positions before ply {} written to {} in {:.1f}s'.format(
+        len(entries), plies, path, perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+Opt-in profiling of the moves chosen by a strategy.
+
+A MoveProfiler runs each suggest_move in one of two modes:
+
+    'hooks'    -- the functions of HOT_PATH are wrapped with counters and
+                  timers, which give the calls, total and self time of
+                  each, and one line per call stack in the folded format
+                  of flamegraph.pl and speedscope
+    'cprofile' -- the move runs under cProfile, whose statistics are
+                  dumped for snakeviz or flameprof
+
+Either way a per-move report is appended to report.txt in the output
+directory, and the files of move N are named moveN.folded or moveN.prof.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+from threading import get_ident
+from time import perf_counter, perf_counter_ns
+
+# (module, attribute path) of the functions wrapped in 'hooks' mode
+HOT_PATH = [
+    ('tippy_state', 'TippyGameState.apply_move'),
+    ('tippy_state', 'TippyGameState.possible_next_moves'),
+    ('tippy_state', 'TippyGameState.is_legal'),
+    ('tippy_state', 'TippyGameState.winner'),
+    ('tippy_state', 'TippyGameState.rough_outcome'),
+    ('tippy_state', 'TippyGameState.__str__'),
+    ('tippy_state', 'contain_tippy'),
+    ('tippy_state', 'contain_tippy_by_transformations'),
+    ('tippy_state', 'transpose'),
+    ('tippy_pattern', 'PatternIndex.contains'),
+    ('tippy_pattern', 'PatternIndex.completes'),
+    ('tippy_batch', 'rough_outcomes'),
+    ('subtract_square_state', 'SubtractSquareState.apply_move'),
+    ('subtract_square_state', 'SubtractSquareState.possible_next_moves'),
+    ('subtract_square_state', 'SubtractSquareState.__str__'),
+]
+MODES = ('hooks', 'cprofile')
+
+
+class HotPathHooks:
+    """
+    Counters and timers wrapped around functions, recording only the calls
+    made by the thread that started the current move.
+
+    targets: list of (str, str) -- (module, attribute path) of the wrapped
+                                   functions
+    stats: dict of {str: list} -- [calls, total ns, self ns] by function
+    folded: dict of {str: int} -- self ns by call stack, the names of the
+                                  stack joined by ';'
+    """
+
+    def __init__(self, targets=HOT_PATH):
+        """(HotPathHooks, list of tuple) -> NoneType
+
+        Create HotPathHooks for targets, not installed yet.
+        """
+        self.targets = targets
+        self.originals = []
+        self.thread = None
+        self.stack = []
+        self.stats, self.folded = {}, {}
+
+    def install(self):
+        """(HotPathHooks) -> NoneType
+
+        Wrap each target whose module is imported already; modules are not
+        imported just to be profiled.
+        """
+        for module_name, path in self.targets:
+            module = sys.modules.get(module_name)
+            if module is None:
+                continue
+            names = path.split('.')
+            owner = module
+            for name in names[:-1]:
+                owner = getattr(owner, name)
+            function = vars(owner).get(names[-1])
+            if function is None:
+                continue
+            self.originals.append((owner, names[-1], function))
+            setattr(owner, names[-1], self.wrap(path, function))
+
+    def uninstall(self):
+        """(HotPathHooks) -> NoneType
+
+        Restore the functions wrapped by install.
+        """
+        for owner, name, function in reversed(self.originals):
+            setattr(owner, name, function)
+        self.originals = []
+
+    def wrap(self, name, function):
+        """(HotPathHooks, str, function) -> function
+
+        Return function, counted and timed as name.
+        """
+        hooks = self
+
+        def wrapper(*args, **kwargs):
+            if get_ident() != hooks.thread:
+                return function(*args, **kwargs)
+            frame = [name, 0]   # name and ns spent in wrapped callees
+            hooks.stack.append(frame)
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                hooks.leave(perf_counter_ns() - start)
+
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        wrapper.__wrapped__ = function
+        return wrapper
+
+    def leave(self, elapsed):
+        """(HotPathHooks, int) -> NoneType
+
+        Pop the innermost frame, which took elapsed ns, and record it.
+        """
+        name, inner = self.stack[-1]
+        key = ';'.join([frame[0] for frame in self.stack])
+        self.stack.pop()
+        if self.stack:
+            self.stack[-1][1] += elapsed
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = [0, 0, 0]
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] += elapsed - inner
+        self.folded[key] = self.folded.get(key, 0) + elapsed - inner
+
+    def run(self, name, function, *args):
+        """(HotPathHooks, str, function, object) -> object
+
+        Return function(*args), recording the calls of the current thread
+        under a root frame called name; the stats of earlier runs are
+        dropped.
+        """
+        self.stats, self.folded = {}, {}
+        self.thread = get_ident()
+        self.stack = [[name, 0]]
+        start = perf_counter_ns()
+        try:
+            return function(*args)
+        finally:
+            self.leave(perf_counter_ns() - start)
+            self.thread = None
+
+    def report(self, out):
+        """(HotPathHooks, file) -> NoneType
+
+        Write the stats of the last run to out, by decreasing self time.
+        """
+        total = sum([stats[2] for stats in self.stats.values()]) or 1
+        out.write('{:48} {:>9} {:>10} {:>10} {:>7}\n'.format(
+            'function', 'calls', 'total ms', 'self ms', 'self %'))
+        for name, (calls, inclusive, own) in sorted(
+                self.stats.items(), key=lambda x: -x[1][2]):
+            out.write('{:48} {:9} {:10.2f} {:10.2f} {:6.1f}%\n'.format(
+                name, calls, inclusive / 1e6, own / 1e6, 100 * own / total))
+
+    def write_folded(self, path):
+        """(HotPathHooks, str) -> NoneType
+
+        Write the folded stacks of the last run to path, in microseconds.
+        """
+        with open(path, 'w') as out:
+            for key, ns in sorted(self.folded.items()):
+                if ns >= 1000:
+                    out.write('{} {}\n'.format(key, ns // 1000))
+
+
+class MoveProfiler:
+    """
+    Profiler of the moves of a game or match, writing into directory.
+
+    mode: str -- 'hooks' or 'cprofile'
+    directory: str -- where report.txt and the per-move files go
+    moves: int -- the number of moves profiled so far
+    """
+
+    def __init__(self, mode='hooks', directory='profile', targets=HOT_PATH):
+        """(MoveProfiler, str, str, list of tuple) -> NoneType
+
+        Create a MoveProfiler; in 'hooks' mode, targets are the functions
+        timed.
+        """
+        if mode not in MODES:
+            raise ValueError('mode must be one of {}'.format(MODES))
+        self.mode, self.directory = mode, directory
+        self.moves = 0
+        self.hooks = HotPathHooks(targets) if mode == 'hooks' else None
+        os.makedirs(directory, exist_ok=True)
+
+    def profile_move(self, strategy, state):
+        """(MoveProfiler, Strategy, GameState) -> Move
+
+        Return strategy.suggest_move(state), profiled, and append its
+        report to report.txt.
+        """
+        self.moves += 1
+        path = os.path.join(self.directory, 'move{}'.format(self.moves))
+        out = io.StringIO()
+        start = perf_counter()
+        if self.mode == 'hooks':
+            self.hooks.install()
+            try:
+                move = self.hooks.run(type(strategy).__name__ +
+                                      '.suggest_move',
+                                      strategy.suggest_move, state)
+            finally:
+                self.hooks.uninstall()
+            seconds = perf_counter() - start
+            self.hooks.report(out)
+            self.hooks.write_folded(path + '.folded')
+        else:
+            profile = cProfile.Profile()
+            move = profile.runcall(strategy.suggest_move, state)
+            seconds = perf_counter() - start
+            stats = pstats.Stats(profile, stream=out)
+            stats.sort_stats('tottime').print_stats(20)
+            stats.dump_stats(path + '.prof')
+        with open(os.path.join(self.directory, 'report.txt'), 'a') as report:
+            report.write('move {} by {}: {} in {:.3f}s\n{}\n'.format(
+                self.moves, state.next_player, move, seconds,
+                out.getvalue()))
+        return move
@@ -0,0 +1,71 @@
+"""
+Games and strategies by name, imported only when they are first loaded.
+
+Each entry maps a short key, as typed by the user of game_view, to the
+module and class implementing it, so that loading one strategy for one
+game imports nothing else.
+"""
+from importlib import import_module
+
+GAMES = {'s': ('subtract_square_state', 'SubtractSquareState'),
+         't': ('tippy_state', 'TippyGameState'),
+         'p': ('subtract_square_piles_state', 'SubtractSquarePilesState')}
+STRATEGIES = {'r': ('strategy_random', 'StrategyRandom'),
+              'm': ('strategy_minimax', 'StrategyMinimax'),
+              'mm': ('strategy_minimax_memoize', 'StrategyMinimaxMemoize'),
+              'mp': ('strategy_minimax_prune', 'StrategyMinimaxPrune'),
+              'my': ('strategy_minimax_myopic', 'StrategyMinimaxMyopic'),
+              'pn': ('strategy_proof_number', 'StrategyProofNumber'),
+              'bk': ('opening_book', 'StrategyBook'),
+              'g': ('subtract_square_grundy', 'StrategyGrundy'),
+              'ss': ('subtract_square_solver',
+                     'StrategySubtractSquareSolver')}
+
+
+def register_game(key, module, name):
+    """(str, str, str) -> NoneType
+
+    Make the GameState subclass name of module loadable as key.
+    """
+    GAMES[key] = (module, name)
+
+
+def register_strategy(key, module, name):
+    """(str, str, str) -> NoneType
+
+    Make the Strategy subclass name of module loadable as key.
+    """
+    STRATEGIES[key] = (module, name)
+
+
+def load(entries, key):
+    """(dict, str) -> type
+
+    Import and return the class registered as key in entries.
+
+    >>> load(GAMES, 's').__name__
+    'SubtractSquareState'
+    """
+    module, name = entries[key]
+    return getattr(import_module(module), name)
+
+
+def load_game(key):
+    """(str) -> GameState.__class__
+
+    Return the game registered as key.
+    """
+    return load(GAMES, key)
+
+
+def load_strategy(key):
+    """(str) -> Strategy.__class__
+
+    Return the strategy registered as key.
+    """
+    return load(STRATEGIES, key)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
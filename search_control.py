@@ -0,0 +1,78 @@
+from time import monotonic
+
+
+class SearchInterrupted(Exception):
+    """
+    Raised inside a search when its SearchControl has been cancelled or
+    its deadline has passed.
+    """
+
+
+class SearchControl:
+    """
+    Cancellation token and deadline shared between a search and its caller.
+
+    deadline: float or None -- value of time.monotonic() after which the
+                               search must stop, or None for no deadline
+    nodes: int -- number of nodes the search has visited so far
+    CLOCK_INTERVAL: int -- number of nodes between two readings of the clock
+    """
+    CLOCK_INTERVAL = 256
+
+    def __init__(self, time_limit=None):
+        """(SearchControl, float) -> NoneType
+
+        Create a new SearchControl (self) that expires time_limit seconds
+        from now, or never if time_limit is None.
+        """
+        self.deadline = (None if time_limit is None
+                         else monotonic() + time_limit)
+        self.nodes = 0
+        self.cancelled = False
+
+    def cancel(self):
+        """(SearchControl) -> NoneType
+
+        Ask the search using self to stop as soon as possible.
+        """
+        self.cancelled = True
+
+    def expired(self):
+        """(SearchControl) -> bool
+
+        Return True iff self has been cancelled or its deadline has passed.
+
+        >>> SearchControl().expired()
+        False
+        >>> SearchControl(0).expired()
+        True
+        """
+        if (not self.cancelled and self.deadline is not None and
+                monotonic() >= self.deadline):
+            self.cancelled = True
+        return self.cancelled
+
+    def check(self):
+        """(SearchControl) -> NoneType
+
+        Count one more node, and raise SearchInterrupted if the search
+        must stop. The clock is only read every CLOCK_INTERVAL nodes.
+        """
+        self.nodes += 1
+        if self.cancelled or (self.nodes % SearchControl.CLOCK_INTERVAL == 0
+                              and self.expired()):
+            raise SearchInterrupted()
+
+
+def check(control):
+    """(SearchControl or NoneType) -> NoneType
+
+    Call control.check() unless control is None.
+    """
+    if control is not None:
+        control.check()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
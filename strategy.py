@@ -1,8 +1,16 @@
+from game_state import GameState
+from search_control import SearchInterrupted, check
+
+
 class Strategy:
     '''Interface to suggest moves for a GameState.
 
     Must be subclassed to a concrete strategy.  Our intention is
     to provide a uniform interface for functions that suggest moves.
+
+    A strategy may be shared by threads playing different games at once:
+    the state of one search lives in its arguments and local variables,
+    and caches kept between searches must be safe for concurrent use.
     '''
 
     def __init__(self, interactive=False):
@@ -17,3 +25,151 @@ class Strategy:
         Suggest a next move for state.
         '''
         raise NotImplementedError('Must be implemented in subclass')
+
+    def root_score(self, state, move, control=None):
+        '''(Strategy, GameState, Move, SearchControl) -> float
+
+        Return the score of move for the next player of state. Raise
+        SearchInterrupted if control stops the search first.
+        '''
+        raise NotImplementedError('Must be implemented in subclass')
+
+    def suggest_move_anytime(self, state, control=None):
+        '''(Strategy, GameState, SearchControl) -> (Move, bool)
+
+        Return the best move found before control stopped the search,
+        together with a flag that is True iff the search finished, so
+        that the move is proven to be a best move.
+
+        The search deepens one move at a time with iter_deepening, and
+        the move returned is the best move of the last depth completed,
+        or the first legal move if not even depth 1 was. A strategy that
+        searches to a limited depth may stop deepening before the move is
+        proven; the flag is then False.
+        '''
+        best_move, finished = next(state.iter_next_moves()), False
+        try:
+            for best_move, finished in self.iter_deepening(state, control):
+                pass
+        except SearchInterrupted:
+            pass
+        return best_move, finished
+
+    def iter_deepening(self, state, control=None, max_depth=None):
+        '''(Strategy, GameState, SearchControl, int) -> generator of tuple
+
+        Yield, for depth 1, 2, ... up to max_depth (with no limit if None),
+        a pair (move, exact) with the best move from state when looking
+        depth moves ahead with depth_score, where exact is True iff no
+        estimate was used, which ends the search. Each depth searches first
+        the best move of the previous one. Raise SearchInterrupted if
+        control stops the search.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=6)
+        >>> [(move.amount, exact)
+        ...  for move, exact in Strategy().iter_deepening(state)]
+        [(4, False), (4, False), (4, True)]
+        '''
+        moves = list(state.iter_next_moves())
+        best_move, depth = moves[0], 1
+        while max_depth is None or depth <= max_depth:
+            best, exact = None, True
+            for move in [best_move] + [m for m in moves if m != best_move]:
+                alpha = GameState.LOSE if best is None else best
+                score, move_exact = self.depth_score(
+                    state.apply_move(move), depth - 1, -GameState.WIN, -alpha,
+                    control)
+                exact = exact and move_exact
+                if best is None or (-1) * score > best:
+                    depth_move, best = move, (-1) * score
+                if best >= GameState.WIN:
+                    break   # nothing can beat it
+            best_move = depth_move
+            yield best_move, exact
+            if exact:
+                return
+            depth += 1
+
+    def depth_score(self, state, depth, alpha, beta, control=None):
+        '''(Strategy, GameState, int, float, float, SearchControl)
+        -> (float, bool)
+
+        Return the score of state for the next player when looking depth
+        moves ahead with alpha-beta pruning, where the states depth moves
+        away are estimated with rough_outcome, and whether that score is
+        exact, as no estimate was used. Strategies with a cache override
+        it to read and fill their cache. The score is fail-soft: a score
+        <= alpha is an upper bound and a score >= beta a lower bound. Raise
+        SearchInterrupted if control stops the search.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=2)
+        >>> Strategy().depth_score(state, 2, GameState.LOSE, GameState.WIN)
+        (-1.0, True)
+        '''
+        check(control)
+        if state.over:
+            return state.outcome(), True
+        elif depth == 0:
+            return state.rough_outcome(), False
+        best, exact = None, True
+        for move, next_state in state.iter_next_states():
+            score, next_exact = self.depth_score(next_state, depth - 1, -beta,
+                                                 -alpha, control)
+            exact = exact and next_exact
+            if best is None or (-1) * score > best:
+                best = (-1) * score
+            alpha = max(alpha, best)
+            if alpha >= beta:
+                break   # because keep going does not change the result
+        return best, exact
+
+    def suggest_move_exhaustive(self, state, control=None):
+        '''(Strategy, GameState, SearchControl) -> (Move, bool)
+
+        Return the best move found before control stopped the search,
+        together with a flag that is True iff the search finished, when
+        the root moves are scored one at a time, each with a full search
+        by root_score; if the search is stopped before any of them is
+        scored, the first legal move is returned. This measures the
+        searches of the strategy itself, which suggest_move_anytime
+        does not use.
+        '''
+        first_move, best_move, best_score = None, None, None
+        try:
+            for move in state.iter_next_moves():
+                if first_move is None:
+                    first_move = move
+                score = self.root_score(state, move, control)
+                if best_score is None or score > best_score:
+                    best_move, best_score = move, score
+                if self.unbeatable(score):
+                    break   # nothing can beat it
+        except SearchInterrupted:
+            if best_move is None:
+                return first_move, False
+            return best_move, False
+        return best_move, True
+
+    def unbeatable(self, score):
+        '''(Strategy, float) -> bool
+
+        Return True iff no move can have a higher score than score.
+        '''
+        return score >= GameState.WIN
+
+    def ponder(self, state, control):
+        '''(Strategy, GameState, SearchControl) -> NoneType
+
+        Use the time while the opponent chooses a move from state to
+        prepare for the replies, until control is cancelled. Strategies
+        without a cache have nothing to prepare.
+        '''
+
+    def cache_stats(self):
+        '''(Strategy) -> (int, int)
+
+        Return the number of cache hits and misses so far.
+        '''
+        return 0, 0
@@ -1,7 +1,6 @@
 from strategy import Strategy
 from game_state import GameState
-from subtract_square_state import SubtractSquareState  # for testing
-from tippy_state import TippyGameState   # for testing
+from search_control import check
 
 
 class StrategyMinimax(Strategy):
@@ -15,16 +14,21 @@ class StrategyMinimax(Strategy):
     """
     TO_WIN, TO_LOSE, TO_TIE = 1.0, -1.0, 0.0
     
-    def get_score(self, state):
-        """(StrategyMinimax, GameState) -> int
+    def get_score(self, state, control=None, table=None):
+        """(StrategyMinimax, GameState, SearchControl, dict) -> int
 
         Return the score of next player, as defined in minimax strategy.
+        Raise SearchInterrupted if control stops the search. If table is
+        not None, the scores of the states searched are looked up in and
+        stored in table, keyed by str(state).
 
+        >>> from subtract_square_state import SubtractSquareState
         >>> state = SubtractSquareState('p1', current_total=2)
         >>> s = StrategyMinimax()
         >>> s.get_score(state)
         1.0
         """
+        check(control)
         if state.over:
             if state.winner(state.next_player):
                 return StrategyMinimax.TO_WIN
@@ -32,10 +36,45 @@ class StrategyMinimax(Strategy):
                 return StrategyMinimax.TO_LOSE
             else:
                 return StrategyMinimax.TO_TIE
+        elif table is not None and str(state) in table:
+            return table[str(state)]
         else:
-            next_states = [state.apply_move(x) for x in
-                           state.possible_next_moves()]
-            return max([(-1) * self.get_score(y) for y in next_states])
+            score = None
+            for move, next_state in state.iter_next_states():
+                next_score = (-1) * self.get_score(next_state, control, table)
+                if score is None or next_score > score:
+                    score = next_score
+                if score == StrategyMinimax.TO_WIN:
+                    break   # no other move can do better
+            if table is not None:
+                table[str(state)] = score
+            return score
+
+    def root_scores(self, state, control=None):
+        """(StrategyMinimax, GameState, SearchControl) -> list of tuple
+
+        Return a list of (move, score) with the exact score, for the next
+        player, of every legal move from state, in the order of
+        possible_next_moves. All the moves are scored in one search sharing
+        a single table, so subtrees reached by several moves are only
+        searched once.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=8)
+        >>> StrategyMinimax().root_scores(state)
+        [(SubtractSquareMove(4), -1.0), (SubtractSquareMove(1), 1.0)]
+        """
+        return list(self.iter_root_scores(state, control))
+
+    def iter_root_scores(self, state, control=None):
+        """(StrategyMinimax, GameState, SearchControl) -> generator of tuple
+
+        Yield the (move, score) pairs of root_scores one at a time, so that
+        the caller can stop early.
+        """
+        table = {}
+        for move, next_state in state.iter_next_states():
+            yield move, (-1) * self.get_score(next_state, control, table)
 
     def bundle_score(self, state):
         """(StrategyMinimax, GameState) -> dict(float: list of Move)
@@ -44,20 +83,29 @@ class StrategyMinimax(Strategy):
         and TO_TIE; their values are lists of Move that lead to these
         scores
 
+        >>> from subtract_square_state import SubtractSquareState
         >>> state = SubtractSquareState('p1', current_total=4)
         >>> s = StrategyMinimax()
         >>> s.bundle_score(state)
         {-1.0: [SubtractSquareMove(1)], 1.0: [SubtracSquareMove(4)]}
         """
         result = {}
-        for move in state.possible_next_moves():
-            score = (-1) * self.get_score(state.apply_move(move))
+        for move, score in self.root_scores(state):
             if score in result:
                 result[score].append(move)
             else:
                 result[score] = [move]
         return result
 
+    def root_score(self, state, move, control=None):
+        """(StrategyMinimax, GameState, Move, SearchControl) -> float
+
+        Return the score of move for the next player of state.
+
+        Overrides Strategy.root_score
+        """
+        return (-1) * self.get_score(state.apply_move(move), control=control)
+
     def suggest_move(self, state):
         """(StrategyMinimax, GameState) -> Move
 
@@ -67,13 +115,18 @@ class StrategyMinimax(Strategy):
 
         Overrides Strategy.suggest_move
 
+        >>> from subtract_square_state import SubtractSquareState
         >>> state = SubtractSquareState('p1', current_total=4)
         >>> s = StrategyMinimax()
         >>> s.suggest_move(state)
         SubtractSquareMove(4)
         """
-        bundled_score = self.bundle_score(state)
-        highest_score = max(bundled_score.keys())
-        return bundled_score[highest_score][0]
+        best_move, highest_score = None, None
+        for move, score in self.iter_root_scores(state):
+            if highest_score is None or score > highest_score:
+                best_move, highest_score = move, score
+            if highest_score == StrategyMinimax.TO_WIN:
+                break   # the first winning move is the first highest
+        return best_move
         
     
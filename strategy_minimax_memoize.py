@@ -1,7 +1,7 @@
+from threading import Lock, local
 from strategy import Strategy
 from game_state import GameState
-from subtract_square_state import SubtractSquareState  # for testing
-from tippy_state import TippyGameState   # for testing
+from search_control import check, SearchInterrupted
 
 
 class StrategyMinimaxMemoize(Strategy):
@@ -10,6 +10,11 @@ class StrategyMinimaxMemoize(Strategy):
     the score of each GameState to avoid redundency. Override the __init__
     method of class Strategy.
 
+    One StrategyMinimaxMemoize may serve games in several threads at once.
+    self.memo is shared without a lock: a position has one score, so
+    threads storing it concurrently store the same value, and only
+    complete scores are stored. Each thread counts its own hits and misses.
+
     TO_WIN: float -- corresponds to score 1.0, the player is guaranteed to win
     TO_LOSE: float -- corresponds to score -1.0, the opponent is guaranteed
                       to win
@@ -23,36 +28,122 @@ class StrategyMinimaxMemoize(Strategy):
         Create new StrategyMinimaxMemoize (self), prompt user if interactive.
         memo is a dictionary whose keys are strings of GameState and the
         corresponding values are their minimax scores for the next player
-        (the computer).
+        (the computer); it may be replaced by a TranspositionTable to bound
+        its size. self.counts holds a [hits, misses] list per thread
+        counting the lookups in memo; self.local.counts is the list of the
+        current thread.
         """
         self.memo = {}
+        self.counts, self.lock, self.local = [], Lock(), local()
+
+    def thread_counts(self):
+        """(StrategyMinimaxMemoize) -> list of int
+
+        Return the [hits, misses] list of the current thread.
+        """
+        counts = getattr(self.local, 'counts', None)
+        if counts is None:
+            counts = self.local.counts = [0, 0]
+            with self.lock:
+                self.counts.append(counts)
+        return counts
 
 # I implemented memoization in the function below,
-    def get_score(self, state):
-        """(StrategyMinimaxMemoize, GameState) -> float
+    def get_score(self, state, control=None):
+        """(StrategyMinimaxMemoize, GameState, SearchControl) -> float
 
         Return the score of state for the next player.
         Memoize the score of Gamestates, and store them in self.memo
+        Raise SearchInterrupted if control stops the search; only
+        completed scores are memoized.
 
+        >>> from subtract_square_state import SubtractSquareState
         >>> state = SubtractSquareState('p1', current_total=2)
         >>> s = StrategyMinimaxMemoize()
         >>> s.get_score(state)
         1.0
         """
-        if not str(state) in self.memo:
-            if state.over:
-                if state.winner(state.next_player):
-                    self.memo[str(state)] = StrategyMinimaxMemoize.TO_WIN
-                elif state.winner(state.opponent()):
-                    self.memo[str(state)] = StrategyMinimaxMemoize.TO_LOSE
-                else:
-                    self.memo[str(state)] = StrategyMinimaxMemoize.TO_TIE
+        check(control)
+        key = str(state)
+        score = self.memo.get(key)
+        if score is not None:
+            self.thread_counts()[0] += 1
+            return score
+        self.thread_counts()[1] += 1
+        if state.over:
+            if state.winner(state.next_player):
+                score = StrategyMinimaxMemoize.TO_WIN
+            elif state.winner(state.opponent()):
+                score = StrategyMinimaxMemoize.TO_LOSE
             else:
-                next_states = [state.apply_move(x) for x in
-                               state.possible_next_moves()]
-                self.memo[str(state)] = max([(-1) * self.get_score(y)
-                                             for y in next_states])
-        return self.memo[str(state)]
+                score = StrategyMinimaxMemoize.TO_TIE
+        else:
+            for move, next_state in state.iter_next_states():
+                next_score = (-1) * self.get_score(next_state, control)
+                if score is None or next_score > score:
+                    score = next_score
+                if score == StrategyMinimaxMemoize.TO_WIN:
+                    break   # no other move can do better
+        self.memo[key] = score
+        return score
+
+    def depth_score(self, state, depth, alpha, beta, control=None):
+        """(StrategyMinimaxMemoize, GameState, int, float, float,
+        SearchControl) -> (float, bool)
+
+        Return Strategy.depth_score of state, but read the exact score of
+        state from self.memo if it is there, and store it in self.memo if
+        the search proves it, so that suggest_move_anytime and get_score
+        share their scores.
+
+        Overrides Strategy.depth_score
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=8)
+        >>> s = StrategyMinimaxMemoize()
+        >>> s.depth_score(state, 9, GameState.LOSE, GameState.WIN)
+        (1.0, True)
+        >>> s.memo[str(state)]
+        1.0
+        """
+        key = str(state)
+        score = self.memo.get(key)
+        if score is not None:
+            check(control)
+            self.thread_counts()[0] += 1
+            return score, True
+        self.thread_counts()[1] += 1
+        score, exact = Strategy.depth_score(self, state, depth, alpha, beta,
+                                            control)
+        # a score outside the window is only a bound, unless no score
+        # can be beyond it
+        if exact and (alpha < score < beta or abs(score) == GameState.WIN):
+            self.memo[key] = score
+        return score, exact
+
+    def root_scores(self, state, control=None):
+        """(StrategyMinimaxMemoize, GameState, SearchControl) -> list of tuple
+
+        Return a list of (move, score) with the exact score, for the next
+        player, of every legal move from state, in the order of
+        possible_next_moves. All the moves share self.memo.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=8)
+        >>> StrategyMinimaxMemoize().root_scores(state)
+        [(SubtractSquareMove(4), -1.0), (SubtractSquareMove(1), 1.0)]
+        """
+        return list(self.iter_root_scores(state, control))
+
+    def iter_root_scores(self, state, control=None):
+        """(StrategyMinimaxMemoize, GameState, SearchControl)
+        -> generator of tuple
+
+        Yield the (move, score) pairs of root_scores one at a time, so that
+        the caller can stop early.
+        """
+        for move, next_state in state.iter_next_states():
+            yield move, (-1) * self.get_score(next_state, control)
 
     def bundle_score(self, state):
         """(StrategyMinimaxMemoize, GameState) -> dict(float: list of Move)
@@ -61,20 +152,54 @@ class StrategyMinimaxMemoize(Strategy):
         and TO_TIE; their values are lists of Move that lead to these
         scores
 
+        >>> from subtract_square_state import SubtractSquareState
         >>> state = SubtractSquareState('p1', current_total=4)
         >>> s = StrategyMinimaxMemoize()
         >>> s.bundle_score(state)
         {-1.0: [SubtractSquareMove(1)], 1.0: [SubtracSquareMove(4)]}
         """
         result = {}
-        for move in state.possible_next_moves():
-            score = (-1) * self.get_score(state.apply_move(move))
+        for move, score in self.root_scores(state):
             if score in result:
                 result[score].append(move)
             else:
                 result[score] = [move]
         return result
 
+    def root_score(self, state, move, control=None):
+        """(StrategyMinimaxMemoize, GameState, Move, SearchControl) -> float
+
+        Return the score of move for the next player of state.
+
+        Overrides Strategy.root_score
+        """
+        return (-1) * self.get_score(state.apply_move(move), control=control)
+
+    def ponder(self, state, control):
+        """(StrategyMinimaxMemoize, GameState, SearchControl) -> NoneType
+
+        Score the state reached by each reply of the opponent from state,
+        filling self.memo, until control is cancelled.
+
+        Overrides Strategy.ponder
+        """
+        try:
+            for move, next_state in state.iter_next_states():
+                self.get_score(next_state, control)
+        except SearchInterrupted:
+            pass
+
+    def cache_stats(self):
+        """(StrategyMinimaxMemoize) -> (int, int)
+
+        Return the number of hits and misses in self.memo so far.
+
+        Overrides Strategy.cache_stats
+        """
+        with self.lock:
+            return (sum([counts[0] for counts in self.counts]),
+                    sum([counts[1] for counts in self.counts]))
+
     def suggest_move(self, state):
         """(StrategyMinimaxMemoize, GameState) -> Move
 
@@ -84,12 +209,17 @@ class StrategyMinimaxMemoize(Strategy):
 
         Overrides Strategy.suggest_move
 
+        >>> from subtract_square_state import SubtractSquareState
         >>> state = SubtractSquareState('p1', current_total=4)
         >>> s = StrategyMinimaxMemoize()
         >>> s.suggest_move(state)
         SubtractSquareMove(4)
         """
-        bundled_score = self.bundle_score(state)
-        highest_score = max(bundled_score.keys())
-        return bundled_score[highest_score][0]
+        best_move, highest_score = None, None
+        for move, score in self.iter_root_scores(state):
+            if highest_score is None or score > highest_score:
+                best_move, highest_score = move, score
+            if highest_score == StrategyMinimaxMemoize.TO_WIN:
+                break   # the first winning move is the first highest
+        return best_move
                 
@@ -1,7 +1,10 @@
 from strategy import Strategy
 from game_state import GameState
-from subtract_square_state import SubtractSquareState  # for testing
-from tippy_state import TippyGameState   # for testing
+from search_control import check
+from strategy_minimax_prune import StrategyMinimaxPrune
+from graded_score import (MATE, ASPIRATION_DELTA, terminal_score,
+                          heuristic_score, is_decisive, to_outcome,
+                          aspiration_search)
 
 
 class StrategyMinimaxMyopic(Strategy):
@@ -13,34 +16,89 @@ class StrategyMinimaxMyopic(Strategy):
     TO_LOSE: float -- corresponds to score -1.0, the opponent is guaranteed
                       to win
     TO_TIE: float -- the game is going to tie
+
+    The settings of a StrategyMinimaxMyopic are not changed after
+    __init__, and each search passes its depth and table down as
+    arguments, so threads playing different games may share one; the only
+    state shared between searches is the locked table of
+    self.endgame_solver.
     """
     TO_WIN, TO_LOSE, TO_TIE = 1.0, -1.0, 0.0
 
-    def __init__(self, interactive=False):
-        """(StrategyMinimaxMyopic, bool) -> NoneType
+    def __init__(self, interactive=False, batch=False, endgame=0,
+                 graded=False, aspiration=True, depth=3):
+        """(StrategyMinimaxMyopic, bool, bool, int, bool, bool, int)
+        -> NoneType
 
         Create new Strategy (self), prompt user if interactive.
         self.n is the number of steps we want this strategy to
-        took ahead
+        took ahead, depth. If batch, bundle_score searches breadth first and
+        estimates the whole frontier at once (see get_scores_batched).
+        States whose endgame_size is below endgame are solved exactly by
+        self.endgame_solver, whose transposition table is kept between
+        searches. If graded, suggest_move uses suggest_move_graded, which
+        searches each depth with an aspiration window if aspiration, and
+        with the full window otherwise.
         """
         # self.n = int(input("How many steps do you want"
         #                    " minimax to look ahead: "))
         # the auto checker may not allow me to input self.n
-        # we set self.n = 3
-        self.n = 3
+        # we set self.n = depth, 3 unless asked otherwise
+        self.n = depth
+        self.batch = batch
+        self.endgame = endgame
+        self.graded = graded
+        self.aspiration = aspiration
+        self.endgame_solver = StrategyMinimaxPrune(mode='pvs', graded=graded)
+
+    def in_endgame(self, state):
+        """(StrategyMinimaxMyopic, GameState) -> bool
+
+        Return True iff state is small enough to be solved exactly.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> s = StrategyMinimaxMyopic(endgame=10)
+        >>> s.in_endgame(SubtractSquareState('p1', current_total=9))
+        True
+        """
+        size = state.endgame_size()
+        return size is not None and size < self.endgame
+
+    def endgame_score(self, state, control=None):
+        """(StrategyMinimaxMyopic, GameState, SearchControl) -> float
+
+        Return the exact score of state, in the endgame, for the next
+        player, solved by self.endgame_solver: TO_WIN, TO_LOSE or TO_TIE
+        even if self.graded, since the scores of get_score lie in
+        [TO_LOSE, TO_WIN]. Raise SearchInterrupted if control stops the
+        search.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=9)
+        >>> StrategyMinimaxMyopic(endgame=10, graded=True).endgame_score(state)
+        1.0
+        """
+        return to_outcome(self.endgame_solver.get_score_pvs(state,
+                                                            control=control))
 
-    def get_score(self, state, step=1):
-        """(StrategyMinimaxMyopic, GameState) -> float
+    def get_score(self, state, step=1, control=None, table=None):
+        """(StrategyMinimaxMyopic, GameState, int, SearchControl, dict)
+        -> float
 
         Return the score of the next player, step counts how many steps
         the recursive has looked ahead. Use rough_outcome to estimate outcome
-        if the step is greater than self.n 
+        if the step is greater than self.n. Raise SearchInterrupted if
+        control stops the search. If table is not None, the scores are
+        looked up in and stored in table, keyed by (str(state), step).
+        States in the endgame get their exact score instead.
 
+        >>> from subtract_square_state import SubtractSquareState
         >>> state = SubtractSquareState('p1', current_total=2)
         >>> s = StrategyMinimaxMyopic()
         >>> s.get_score(state)
         1.0
         """
+        check(control)
         if state.over:
             if state.winner(state.next_player):
                 return StrategyMinimaxMyopic.TO_WIN
@@ -48,13 +106,271 @@ class StrategyMinimaxMyopic(Strategy):
                 return StrategyMinimaxMyopic.TO_LOSE
             else:
                 return StrategyMinimaxMyopic.TO_TIE
+        elif self.in_endgame(state):
+            return self.endgame_score(state, control)
         elif step == self.n:
             return state.rough_outcome()
+        elif table is not None and (str(state), step) in table:
+            return table[(str(state), step)]
         else:
-            next_states = [state.apply_move(x) for x in
-                           state.possible_next_moves()]
-            return max([(-1) * self.get_score(y, step + 1)
-                        for y in next_states])
+            score = None
+            for move, next_state in state.iter_next_states():
+                next_score = (-1) * self.get_score(next_state, step + 1,
+                                                   control, table)
+                if score is None or next_score > score:
+                    score = next_score
+                if score == StrategyMinimaxMyopic.TO_WIN:
+                    break   # no other move can do better
+            if table is not None:
+                table[(str(state), step)] = score
+            return score
+
+    def get_scores_batched(self, states, control=None):
+        """(StrategyMinimaxMyopic, list of GameState, SearchControl)
+        -> list of float
+
+        Return [self.get_score(s, control=control) for s in states], but
+        expand the states breadth first and estimate all the states at
+        step self.n with a single call to estimate_frontier.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> states = [SubtractSquareState('p1', current_total=t)
+        ...           for t in [1, 2]]
+        >>> StrategyMinimaxMyopic().get_scores_batched(states)
+        [1.0, -1.0]
+        """
+        levels, frontier, level, step = [], [], states, 1
+        # each level records, for each of its states, ('score', value),
+        # ('frontier', index in frontier) or ('children', start, stop)
+        # where start:stop is the slice of the next level holding its
+        # children
+        while level:
+            entries, next_level = [], []
+            for state in level:
+                check(control)
+                if state.over:
+                    entries.append(('score', state.outcome()))
+                elif self.in_endgame(state):
+                    entries.append(('score',
+                                    self.endgame_score(state, control)))
+                elif step == self.n:
+                    entries.append(('frontier', len(frontier)))
+                    frontier.append(state)
+                else:
+                    start = len(next_level)
+                    next_level.extend(state.apply_move(x) for x in
+                                      state.possible_next_moves())
+                    entries.append(('children', start, len(next_level)))
+            levels.append(entries)
+            level, step = next_level, step + 1
+        estimates = self.estimate_frontier(frontier)
+        scores = []
+        for entries in reversed(levels):
+            next_scores, scores = scores, []
+            for entry in entries:
+                if entry[0] == 'score':
+                    scores.append(entry[1])
+                elif entry[0] == 'frontier':
+                    scores.append(estimates[entry[1]])
+                else:
+                    scores.append(max([(-1) * y for y in
+                                       next_scores[entry[1]:entry[2]]]))
+        return scores
+
+    def estimate_frontier(self, states):
+        """(StrategyMinimaxMyopic, list of GameState) -> list of float
+
+        Return [s.rough_outcome() for s in states], evaluated as one
+        NumPy batch when the states are Tippy grids and NumPy is available.
+        """
+        if states and hasattr(states[0], 'grid'):
+            import tippy_batch
+            if tippy_batch.available():
+                return tippy_batch.rough_outcomes(states)
+        return [s.rough_outcome() for s in states]
+
+    def search(self, state, depth, alpha, beta, ply, control=None):
+        """(StrategyMinimaxMyopic, GameState, int, float, float, int,
+            SearchControl) -> float
+
+        Return the graded score of state for the next player, looking depth
+        moves ahead with alpha-beta pruning, where state is ply moves from
+        the root. The score is fail-soft: a score <= alpha is an upper bound
+        and a score >= beta a lower bound of the true score. Raise
+        SearchInterrupted if control stops the search.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=3)
+        >>> StrategyMinimaxMyopic().search(state, 3, -MATE, MATE, 0)
+        997.0
+        """
+        check(control)
+        if state.over:
+            return terminal_score(state, ply)
+        elif self.in_endgame(state):
+            return self.endgame_solver.get_score_pvs(state, alpha, beta,
+                                                     control, ply)
+        elif depth == 0:
+            return heuristic_score(state)
+        best = None
+        for move, next_state in state.iter_next_states():
+            score = (-1) * self.search(next_state, depth - 1, -beta, -alpha,
+                                       ply + 1, control)
+            if best is None or score > best:
+                best = score
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break   # because keep going does not change the result
+        return best
+
+    def search_root(self, state, depth, alpha, beta, control=None,
+                    first=None):
+        """(StrategyMinimaxMyopic, GameState, int, float, float,
+            SearchControl, Move) -> (Move, float)
+
+        Return a legal move from state with the highest graded score when
+        looking depth moves ahead, and that score, fail-soft with respect
+        to the window (alpha, beta). The move first, if given, is searched
+        first, and kept when others only tie with it.
+        """
+        best_move, best = None, None
+        for move in ordered_moves(state, first):
+            bound = alpha if best is None else max(alpha, best)
+            score = (-1) * self.search(state.apply_move(move), depth - 1,
+                                       -beta, -bound, 1, control)
+            if best is None or score > best:
+                best_move, best = move, score
+            if best >= beta or best >= MATE - 1:
+                break
+        return best_move, best
+
+    def iter_graded(self, state, control=None):
+        """(StrategyMinimaxMyopic, GameState, SearchControl)
+        -> generator of tuple
+
+        Yield, for each depth from 1 up to self.n, a legal move from state
+        with the highest graded score when looking depth moves ahead, and
+        that score. Each depth searches first the best move of the previous
+        depth, in a window around the score of the previous depth if
+        self.aspiration. It stops early once a win or loss is proven.
+        """
+        move, score = None, None
+        for depth in range(1, self.n + 1):
+            move, score = aspiration_search(
+                lambda alpha, beta: self.search_root(state, depth, alpha,
+                                                     beta, control, move),
+                score if self.aspiration else None, ASPIRATION_DELTA)
+            yield move, score
+            if is_decisive(score):
+                break   # looking further cannot change a proven result
+
+    def suggest_move_graded(self, state, control=None):
+        """(StrategyMinimaxMyopic, GameState, SearchControl) -> (Move, float)
+
+        Return a legal move from state with the highest graded score, and
+        that score, the last pair of iter_graded.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=3)
+        >>> StrategyMinimaxMyopic(graded=True).suggest_move_graded(state)
+        (SubtractSquareMove(1), 997.0)
+        """
+        for move, score in self.iter_graded(state, control):
+            pass
+        return move, score
+
+    def iter_deepening(self, state, control=None):
+        """(StrategyMinimaxMyopic, GameState, SearchControl)
+        -> generator of tuple
+
+        Yield, for each depth from 1 up to self.n, a pair (move, exact) with
+        the best move when looking depth moves ahead, where exact is True
+        iff the score of the move is proven: it was not estimated with
+        rough_outcome (or heuristic_score if self.graded, where a proven
+        score is decisive). The search stops at the first exact move, and
+        the move of depth self.n may not be exact.
+
+        Overrides Strategy.iter_deepening
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=6)
+        >>> list(StrategyMinimaxMyopic().iter_deepening(state))[-1]
+        (SubtractSquareMove(4), True)
+        >>> state = SubtractSquareState('p1', current_total=29)
+        >>> list(StrategyMinimaxMyopic().iter_deepening(state))[-1][1]
+        False
+        """
+        if self.graded:
+            for move, score in self.iter_graded(state, control):
+                yield move, is_decisive(score)
+        else:
+            yield from Strategy.iter_deepening(self, state, control, self.n)
+
+    def depth_score(self, state, depth, alpha, beta, control=None):
+        """(StrategyMinimaxMyopic, GameState, int, float, float,
+        SearchControl) -> (float, bool)
+
+        Return Strategy.depth_score of state, except that states in the
+        endgame get their exact score from endgame_score.
+
+        Overrides Strategy.depth_score
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=9)
+        >>> StrategyMinimaxMyopic(endgame=10).depth_score(
+        ...     state, 0, GameState.LOSE, GameState.WIN)
+        (1.0, True)
+        """
+        if not state.over and self.in_endgame(state):
+            check(control)
+            return self.endgame_score(state, control), True
+        return Strategy.depth_score(self, state, depth, alpha, beta, control)
+
+    def unbeatable(self, score):
+        """(StrategyMinimaxMyopic, float) -> bool
+
+        Return True iff no move can have a higher score than score.
+
+        Overrides Strategy.unbeatable
+        """
+        if self.graded:
+            return score >= MATE - 1   # winning at once
+        return score >= StrategyMinimaxMyopic.TO_WIN
+
+    def root_scores(self, state, control=None):
+        """(StrategyMinimaxMyopic, GameState, SearchControl) -> list of tuple
+
+        Return a list of (move, score) with the score, for the next player,
+        of every legal move from state, in the order of possible_next_moves.
+        All the moves are scored in one search: breadth first if self.batch,
+        otherwise depth first sharing a single table.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=8)
+        >>> StrategyMinimaxMyopic().root_scores(state)
+        [(SubtractSquareMove(4), -1.0), (SubtractSquareMove(1), 1.0)]
+        """
+        return list(self.iter_root_scores(state, control))
+
+    def iter_root_scores(self, state, control=None):
+        """(StrategyMinimaxMyopic, GameState, SearchControl)
+        -> generator of tuple
+
+        Yield the (move, score) pairs of root_scores one at a time, so that
+        the caller can stop early. If self.batch, every move is scored
+        before the first pair is yielded.
+        """
+        if self.batch:
+            moves = state.possible_next_moves()
+            scores = self.get_scores_batched([state.apply_move(move)
+                                              for move in moves], control)
+            for move, score in zip(moves, scores):
+                yield move, (-1) * score
+        else:
+            table = {}
+            for move, next_state in state.iter_next_states():
+                yield move, (-1) * self.get_score(next_state, control=control,
+                                                  table=table)
 
     def bundle_score(self, state):
         """(StrategyMinimaxMyopic, GameState) -> dict(float: list of Move)
@@ -63,6 +379,7 @@ class StrategyMinimaxMyopic(Strategy):
         [TO_LOSE, TO_WIN]; their values are lists of Move that lead to these
         scores
 
+        >>> from subtract_square_state import SubtractSquareState
         >>> state = SubtractSquareState('p1', current_total=100)
         >>> s = StrategyMinimaxMyopic()
         How many steps do you want minimax to look ahead: 1
@@ -70,14 +387,25 @@ class StrategyMinimaxMyopic(Strategy):
         [SubtractSquareMove(36), SubtractSquareMove(64)]
         """
         result = {}
-        for move in state.possible_next_moves():
-            score = (-1) * self.get_score(state.apply_move(move))
+        for move, score in self.root_scores(state):
             if score in result:
                 result[score].append(move)
             else:
                 result[score] = [move]
         return result
 
+    def root_score(self, state, move, control=None):
+        """(StrategyMinimaxMyopic, GameState, Move, SearchControl) -> float
+
+        Return the score of move for the next player of state.
+
+        Overrides Strategy.root_score
+        """
+        if self.graded:
+            return (-1) * self.search(state.apply_move(move), self.n - 1,
+                                      -MATE, MATE, 1, control)
+        return (-1) * self.get_score(state.apply_move(move), control=control)
+
     def suggest_move(self, state):
         """(StrategyMinimaxMyopic, GameState) -> Move
 
@@ -87,13 +415,31 @@ class StrategyMinimaxMyopic(Strategy):
 
         Overrides Strategy.suggest_move
 
+        >>> from subtract_square_state import SubtractSquareState
         >>> state = SubtractSquareState('p1', current_total=4)
         >>> s = StrategyMinimaxMyopic()
         How many steps do you want minimax to look ahead: 1
         >>> s.suggest_move(state)
         SubtractSquareMove(4)
         """
-        bundled_score = self.bundle_score(state)
-        highest_score = max(bundled_score.keys())
-        return bundled_score[highest_score][0]
-            
+        if self.graded:
+            return self.suggest_move_graded(state)[0]
+        best_move, highest_score = None, None
+        for move, score in self.iter_root_scores(state):
+            if highest_score is None or score > highest_score:
+                best_move, highest_score = move, score
+            if highest_score == StrategyMinimaxMyopic.TO_WIN:
+                break   # the first winning move is the first highest
+        return best_move
+
+
+def ordered_moves(state, first=None):
+    """(GameState, Move) -> generator of Move
+
+    Yield first, if it is not None, then the other legal moves from state.
+    """
+    if first is not None:
+        yield first
+    for move in state.iter_next_moves():
+        if move != first:
+            yield move
@@ -1,7 +1,10 @@
 from strategy import Strategy
 from game_state import GameState
-from subtract_square_state import SubtractSquareState  # for testing
-from tippy_state import TippyGameState   # for testing
+from search_control import check, SearchInterrupted
+from transposition import TranspositionTable
+from graded_score import (MATE, FULL_WINDOW, ASPIRATION_DELTA, terminal_score,
+                          to_table, from_table, to_outcome,
+                          aspiration_search)
 
 
 class StrategyMinimaxPrune(Strategy):
@@ -13,22 +16,66 @@ class StrategyMinimaxPrune(Strategy):
     TO_LOSE: float -- corresponds to score -1.0, the opponent is guaranteed
                       to win
     TO_TIE: float -- the game is going to tie
+    NULL_WINDOW: float -- width of the windows used to test whether a move
+                          beats the best move found so far, smaller than
+                          the difference between any two distinct scores
     """
     TO_WIN, TO_LOSE, TO_TIE = 1.0, -1.0, 0.0
-    
-    def get_score(self, state, least=TO_LOSE):
-        """(StrategyMinimaxPrune, GameState, float) -> float
+    NULL_WINDOW = 0.001
+
+    def __init__(self, interactive=False, mode='prune', graded=False):
+        """(StrategyMinimaxPrune, bool, str, bool) -> NoneType
+
+        Create new StrategyMinimaxPrune (self), prompt user if interactive.
+        mode is 'prune' to search with get_score, or 'pvs' to search with
+        get_score_pvs; self.table is the transposition table of 'pvs'.
+        If graded, 'pvs' uses the graded scores of graded_score, and each
+        search aspires to a window around a guess of the score of the root.
+
+        Searches in several threads may share self: self.table locks its
+        entries, and the only state of a search outside self.table is in
+        its arguments.
+        """
+        self.mode = mode
+        self.graded = graded
+        self.table = TranspositionTable()
+
+    def window(self):
+        """(StrategyMinimaxPrune) -> (float, float)
+
+        Return the lowest and highest scores of get_score_pvs.
+        """
+        if self.graded:
+            return FULL_WINDOW
+        return StrategyMinimaxPrune.TO_LOSE, StrategyMinimaxPrune.TO_WIN
+
+    def unbeatable(self, score):
+        """(StrategyMinimaxPrune, float) -> bool
+
+        Return True iff no move can have a higher score than score.
+
+        Overrides Strategy.unbeatable
+        """
+        if self.graded:
+            return score >= MATE - 1   # winning at once
+        return score >= StrategyMinimaxPrune.TO_WIN
+
+    def get_score(self, state, least=TO_LOSE, control=None):
+        """(StrategyMinimaxPrune, GameState, float, SearchControl) -> float
 
         Return the score of next player, as defined in minimax strategy,
         using pruning technique. We avoid investigating moves that do not
         change the result. To implement this, we stop investing the move when
         we find a score that is greater than or equal to (-1) * least.
+        Raise SearchInterrupted if control stops the search.
 
+        >>> from subtract_square_state import SubtractSquareState
         >>> state = SubtractSquareState('p1', current_total=2)
         >>> s = StrategyMinimaxPrune()
         >>> s.get_score(state)
         1.0
         """
+        check(control)
         if state.over:
             if state.winner(state.next_player):
                 return StrategyMinimaxPrune.TO_WIN
@@ -38,15 +85,233 @@ class StrategyMinimaxPrune(Strategy):
                 return StrategyMinimaxPrune.TO_TIE
         else:
             guaranteed = StrategyMinimaxPrune.TO_LOSE
-            for move in state.possible_next_moves():
-                next_state = state.apply_move(move)
-                next_score = (-1) * self.get_score(next_state, guaranteed)
+            for move, next_state in state.iter_next_states():
+                next_score = (-1) * self.get_score(next_state, guaranteed,
+                                                   control)
                 if next_score > guaranteed:
                     guaranteed = next_score  # update guaranteed score
                 if guaranteed >= (-1) * least:
                     break   # because keep going does not change the result
             return guaranteed
 
+    def get_score_pvs(self, state, alpha=None, beta=None, control=None,
+                      ply=0):
+        """(StrategyMinimaxPrune, GameState, float, float, SearchControl,
+            int) -> float
+
+        Return the score of next player using principal variation search:
+        the first move is searched with the window (alpha, beta), and every
+        other move only with a null window testing whether it beats the best
+        score so far; a move is searched again with a full window only when
+        it does. A score <= alpha is only an upper bound of the true score,
+        and a score >= beta only a lower bound; alpha and beta default to
+        self.window(). Scores and bounds are kept in self.table. ply is the
+        number of moves from the root of the search, which graded scores
+        depend on. Raise SearchInterrupted if control stops the search.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=2)
+        >>> s = StrategyMinimaxPrune(mode='pvs')
+        >>> s.get_score_pvs(state)
+        -1.0
+        """
+        check(control)
+        if alpha is None:
+            alpha = self.window()[0]
+        if beta is None:
+            beta = self.window()[1]
+        if state.over:
+            if self.graded:
+                return terminal_score(state, ply)
+            elif state.winner(state.next_player):
+                return StrategyMinimaxPrune.TO_WIN
+            elif state.winner(state.opponent()):
+                return StrategyMinimaxPrune.TO_LOSE
+            else:
+                return StrategyMinimaxPrune.TO_TIE
+        key, original_alpha = str(state), alpha
+        entry = self.table.get(key)
+        if entry is not None:
+            value, flag = from_table(entry[0], ply), entry[1]
+            if flag == TranspositionTable.EXACT:
+                return value
+            elif flag == TranspositionTable.LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+        best = None
+        for move, next_state in state.iter_next_states():
+            if best is None:
+                score = (-1) * self.get_score_pvs(next_state, -beta, -alpha,
+                                                  control, ply + 1)
+            else:
+                score = (-1) * self.get_score_pvs(
+                    next_state, -alpha - StrategyMinimaxPrune.NULL_WINDOW,
+                    -alpha, control, ply + 1)
+                if alpha < score < beta:
+                    # the move beats the others, find its exact score
+                    score = (-1) * self.get_score_pvs(next_state, -beta,
+                                                      -score, control,
+                                                      ply + 1)
+            if best is None or score > best:
+                best = score
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break   # because keep going does not change the result
+        if best <= original_alpha:
+            flag = TranspositionTable.UPPER
+        elif best >= beta:
+            flag = TranspositionTable.LOWER
+        else:
+            flag = TranspositionTable.EXACT
+        self.table[key] = (to_table(best, ply), flag)
+        return best
+
+    def root_score(self, state, move, control=None):
+        """(StrategyMinimaxPrune, GameState, Move, SearchControl) -> float
+
+        Return the score of move for the next player of state.
+
+        Overrides Strategy.root_score
+        """
+        if self.mode == 'pvs':
+            return (-1) * self.get_score_pvs(state.apply_move(move),
+                                             control=control, ply=1)
+        return (-1) * self.get_score(state.apply_move(move), control=control)
+
+    def depth_score(self, state, depth, alpha, beta, control=None):
+        """(StrategyMinimaxPrune, GameState, int, float, float, SearchControl)
+        -> (float, bool)
+
+        Return Strategy.depth_score of state. In mode 'pvs', the outcome
+        or bound of state kept in self.table is used first, so that
+        suggest_move_anytime profits from pondering, and a score the search
+        proves is stored there if the scores are not graded.
+
+        Overrides Strategy.depth_score
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=8)
+        >>> s = StrategyMinimaxPrune(mode='pvs')
+        >>> s.depth_score(state, 9, GameState.LOSE, GameState.WIN)
+        (1.0, True)
+        >>> s.table[str(state)][0]
+        1.0
+        """
+        if self.mode != 'pvs' or state.over:
+            return Strategy.depth_score(self, state, depth, alpha, beta,
+                                        control)
+        key = str(state)
+        entry = self.table.get(key)
+        if entry is not None:
+            # graded entries only hold proven scores, whose outcome is
+            # their sign
+            value, flag = to_outcome(entry[0]), entry[1]
+            if flag == TranspositionTable.EXACT:
+                check(control)
+                return value, True
+            elif flag == TranspositionTable.LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                check(control)
+                return value, True
+        score, exact = Strategy.depth_score(self, state, depth, alpha, beta,
+                                            control)
+        if exact and not self.graded:
+            if score <= alpha:
+                flag = TranspositionTable.UPPER
+            elif score >= beta:
+                flag = TranspositionTable.LOWER
+            else:
+                flag = TranspositionTable.EXACT
+            self.table[key] = (score, flag)
+        return score, exact
+
+    def ponder(self, state, control):
+        """(StrategyMinimaxPrune, GameState, SearchControl) -> NoneType
+
+        In mode 'pvs', search the state reached by each reply of the
+        opponent from state, filling self.table, until control is
+        cancelled. Mode 'prune' keeps nothing between searches, so it has
+        nothing to prepare.
+
+        Overrides Strategy.ponder
+        """
+        if self.mode != 'pvs':
+            return
+        try:
+            for move, next_state in state.iter_next_states():
+                self.get_score_pvs(next_state, control=control)
+        except SearchInterrupted:
+            pass
+
+    def cache_stats(self):
+        """(StrategyMinimaxPrune) -> (int, int)
+
+        Return the number of hits and misses in self.table so far.
+
+        Overrides Strategy.cache_stats
+        """
+        return self.table.hits, self.table.misses
+
+    def search_root_pvs(self, state, alpha, beta, control=None):
+        """(StrategyMinimaxPrune, GameState, float, float, SearchControl)
+        -> (Move, float)
+
+        Return the first legal move from state with the highest score for
+        the next player, and that score, searching the moves after the first
+        with null windows as get_score_pvs does. The score is fail-soft
+        with respect to the window (alpha, beta).
+        """
+        best_move, best = None, None
+        for move, next_state in state.iter_next_states():
+            if best is None:
+                score = (-1) * self.get_score_pvs(next_state, -beta, -alpha,
+                                                  control, 1)
+            else:
+                bound = max(alpha, best)
+                score = (-1) * self.get_score_pvs(
+                    next_state, -bound - StrategyMinimaxPrune.NULL_WINDOW,
+                    -bound, control, 1)
+                if bound < score < beta:
+                    score = (-1) * self.get_score_pvs(next_state, -beta,
+                                                      -score, control, 1)
+            if best is None or score > best:
+                best_move, best = move, score
+            if best >= beta or self.unbeatable(best):
+                break
+        return best_move, best
+
+    def suggest_move_pvs(self, state, guess=None):
+        """(StrategyMinimaxPrune, GameState, float) -> Move
+
+        Return the first legal move that leads to the highest score for the
+        next player, using get_score_pvs: the moves after the first are only
+        searched in full when a null window search shows they are better.
+        With graded scores, the search first aspires to a window around
+        guess, which defaults to the score of state in self.table, left by
+        an earlier search or by ponder, if there is one.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=4)
+        >>> s = StrategyMinimaxPrune(mode='pvs')
+        >>> s.suggest_move_pvs(state)
+        SubtractSquareMove(4)
+        """
+        if not self.graded:
+            return self.search_root_pvs(state, *self.window())[0]
+        if guess is None:
+            entry = self.table.get(str(state))
+            if entry is not None:
+                guess = from_table(entry[0], 0)
+        return aspiration_search(
+            lambda alpha, beta: self.search_root_pvs(state, alpha, beta),
+            guess, ASPIRATION_DELTA)[0]
+
     def suggest_move(self, state):
         """(StrategyMinimaxPrune, GameState) -> Move
 
@@ -56,20 +321,23 @@ class StrategyMinimaxPrune(Strategy):
 
         Overrides Strategy.suggest_move
 
+        >>> from subtract_square_state import SubtractSquareState
         >>> state = SubtractSquareState('p1', current_total=4)
         >>> s = StrategyMinimaxPrune()
         >>> s.suggest_move(state)
         SubtractSquareMove(4)
         """
+        if self.mode == 'pvs':
+            return self.suggest_move_pvs(state)
         tie_moves = []  # a list used to store moves leading to a tie
-        for move in state.possible_next_moves():
-            score = (-1) * self.get_score(state.apply_move(move))
+        for move, next_state in state.iter_next_states():
+            score = (-1) * self.get_score(next_state)
             if score == StrategyMinimaxPrune.TO_WIN:
                 return move
             elif score == StrategyMinimaxPrune.TO_TIE:
                 tie_moves.append(move)
         if tie_moves == []:  # no strategy to win or tie
-            return state.possible_next_moves()[0]
+            return next(state.iter_next_moves())
         else:
             return tie_moves[0]
                 
@@ -0,0 +1,248 @@
+from math import inf
+from strategy import Strategy
+from game_state import GameState
+from search_control import check
+from transposition import TranspositionTable
+
+
+class ProofNode:
+    """
+    A node of the tree searched by ProofNumberSolver.
+
+    state: GameState -- the position of the node
+    move: Move -- the move from the parent leading to state
+    parent: ProofNode or None -- the parent, None for the root
+    children: list of ProofNode or None -- None until the node is expanded
+    is_or: bool -- True iff the player the question is about moves next
+    pn: float -- proof number, the least number of leaves to prove
+    dn: float -- disproof number, the least number of leaves to disprove
+    """
+    __slots__ = ['state', 'move', 'parent', 'children', 'is_or', 'pn', 'dn']
+
+    def __init__(self, state, move, parent, is_or):
+        """(ProofNode, GameState, Move, ProofNode, bool) -> NoneType
+
+        Create an unexpanded ProofNode.
+        """
+        self.state, self.move, self.parent = state, move, parent
+        self.children, self.is_or = None, is_or
+        self.pn, self.dn = 1, 1
+
+
+class ProofNumberSolver:
+    """
+    Proof-number search answering whether a player can force an outcome
+    of at least some threshold.
+
+    table: TranspositionTable -- proven (True) and disproven (False)
+                                 positions, bounded to max_table entries
+    max_nodes: int or None -- most expansions per question, or None
+    progress: function or None -- called with (pn, dn, nodes) of the root
+                                  every progress_interval expansions
+    root: ProofNode or None -- root of the last search
+    nodes: int -- number of expansions in the last search
+    """
+
+    def __init__(self, max_table=1000000, max_nodes=None, progress=None,
+                 progress_interval=1000, table=None):
+        """(ProofNumberSolver, int, int, function, int, TranspositionTable)
+        -> NoneType
+
+        Create a new ProofNumberSolver, storing its results in table, or in
+        a new table of max_table entries if table is None. A solver holds
+        the tree of its search, so solvers in different threads need one
+        each, but they may share a table.
+        """
+        if table is None:
+            table = TranspositionTable(max_table)
+        self.table = table
+        self.max_nodes = max_nodes
+        self.progress, self.progress_interval = progress, progress_interval
+        self.root, self.nodes = None, 0
+
+    def proof_number(self):
+        """(ProofNumberSolver) -> float
+
+        Return the proof number of the root of the last search.
+        """
+        return self.root.pn
+
+    def disproof_number(self):
+        """(ProofNumberSolver) -> float
+
+        Return the disproof number of the root of the last search.
+        """
+        return self.root.dn
+
+    def prove(self, state, threshold, control=None):
+        """(ProofNumberSolver, GameState, float, SearchControl) -> bool
+
+        Return True iff state.next_player can force an outcome of at least
+        threshold, False iff they cannot, or None if max_nodes expansions
+        did not decide. Raise SearchInterrupted if control stops the search.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> solver = ProofNumberSolver()
+        >>> solver.prove(SubtractSquareState('p1', current_total=7),
+        ...              GameState.WIN)
+        False
+        >>> solver.proof_number(), solver.disproof_number()
+        (inf, 0)
+        """
+        player = state.next_player
+        self.root = ProofNode(state, None, None, True)
+        self.nodes = 0
+        if state.over:
+            self.evaluate(self.root, player, threshold)
+        else:
+            # the root is always expanded, so that proving_move can answer
+            self.expand(self.root, player, threshold)
+            self.update(self.root, player, threshold)
+        while self.root.pn != 0 and self.root.dn != 0:
+            check(control)
+            if self.max_nodes is not None and self.nodes >= self.max_nodes:
+                return None
+            node = self.most_proving(self.root)
+            self.expand(node, player, threshold)
+            self.update(node, player, threshold)
+            self.nodes += 1
+            if (self.progress is not None and
+                    self.nodes % self.progress_interval == 0):
+                self.progress(self.root.pn, self.root.dn, self.nodes)
+        return self.root.pn == 0
+
+    def evaluate(self, node, player, threshold):
+        """(ProofNumberSolver, ProofNode, str, float) -> NoneType
+
+        Set the proof and disproof numbers of the unexpanded node, from the
+        outcome if the game is over, or from self.table if it is known.
+        """
+        state = node.state
+        if state.over:
+            outcome = state.outcome()
+            if state.next_player != player:
+                outcome = (-1) * outcome
+            proven = outcome >= threshold
+        else:
+            proven = self.table.get((str(state), player, threshold))
+        if proven is True:
+            node.pn, node.dn = 0, inf
+        elif proven is False:
+            node.pn, node.dn = inf, 0
+
+    def most_proving(self, node):
+        """(ProofNumberSolver, ProofNode) -> ProofNode
+
+        Return the unexpanded node below node whose expansion helps most,
+        following the child with the least proof number at OR nodes and the
+        least disproof number at AND nodes.
+        """
+        while node.children is not None:
+            if node.is_or:
+                node = min(node.children, key=lambda x: x.pn)
+            else:
+                node = min(node.children, key=lambda x: x.dn)
+        return node
+
+    def expand(self, node, player, threshold):
+        """(ProofNumberSolver, ProofNode, str, float) -> NoneType
+
+        Create and evaluate the children of node.
+        """
+        node.children = []
+        for move in node.state.possible_next_moves():
+            child = ProofNode(node.state.apply_move(move), move, node,
+                              not node.is_or)
+            self.evaluate(child, player, threshold)
+            node.children.append(child)
+
+    def update(self, node, player, threshold):
+        """(ProofNumberSolver, ProofNode, str, float) -> NoneType
+
+        Recompute the proof and disproof numbers of node and its ancestors.
+        A node that becomes proven or disproven is stored in self.table,
+        and its children are dropped unless it is the root.
+        """
+        while node is not None:
+            if node.is_or:
+                node.pn = min([x.pn for x in node.children])
+                node.dn = sum([x.dn for x in node.children])
+            else:
+                node.pn = sum([x.pn for x in node.children])
+                node.dn = min([x.dn for x in node.children])
+            if node.pn == 0 or node.dn == 0:
+                self.table[(str(node.state), player, threshold)] = (
+                    node.pn == 0)
+                if node.parent is not None:
+                    node.children = []
+            node = node.parent
+
+    def proving_move(self):
+        """(ProofNumberSolver) -> Move
+
+        Return the move at the root of the last search that is proven, or
+        the most promising one if none is.
+        """
+        return min(self.root.children, key=lambda x: x.pn).move
+
+    def solve(self, state, control=None):
+        """(ProofNumberSolver, GameState, SearchControl) -> (float, Move)
+
+        Return the outcome, in {WIN, DRAW, LOSE}, that state.next_player
+        can force from state, and a move forcing it; the outcome is None if
+        max_nodes expansions did not decide it.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> ProofNumberSolver().solve(SubtractSquareState('p1',
+        ...                                               current_total=8))
+        (1.0, SubtractSquareMove(1))
+        """
+        if state.over:
+            return state.outcome(), None
+        for threshold in [GameState.WIN, GameState.DRAW]:
+            proven = self.prove(state, threshold, control)
+            if proven is None:
+                return None, self.proving_move()
+            elif proven:
+                return threshold, self.proving_move()
+        return GameState.LOSE, state.possible_next_moves()[0]
+
+
+class StrategyProofNumber(Strategy):
+    """
+    Interface to suggest moves proven by proof-number search.
+
+    table: TranspositionTable -- the proven and disproven positions, kept
+                                 between moves
+    max_nodes: int or None -- most expansions per question, or None
+    """
+
+    def __init__(self, interactive=False, max_table=1000000, max_nodes=None):
+        """(StrategyProofNumber, bool, int, int) -> NoneType
+
+        Create new StrategyProofNumber (self), prompt user if interactive.
+        """
+        self.table = TranspositionTable(max_table)
+        self.max_nodes = max_nodes
+
+    def suggest_move(self, state):
+        """(StrategyProofNumber, GameState) -> Move
+
+        Return a move forcing the best outcome for the next player, found
+        by a new ProofNumberSolver sharing self.table, so that calls from
+        several threads do not share a search tree.
+
+        Overrides Strategy.suggest_move
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=4)
+        >>> StrategyProofNumber().suggest_move(state)
+        SubtractSquareMove(4)
+        """
+        solver = ProofNumberSolver(max_nodes=self.max_nodes, table=self.table)
+        return solver.solve(state)[1]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,214 @@
+"""
+Sprague-Grundy values of Subtract Square, for games played on several
+piles.
+
+Subtract Square is impartial: both players have the same moves. By the
+Sprague-Grundy theorem, a pile of total t then plays like a Nim heap of
+size grundy(t), the least value that no total reachable from t has, and
+a sum of piles plays like the Nim heap of the XOR of their values. The
+player to move wins iff that XOR is not 0, and wins by moving one pile
+to a total whose value makes the XOR 0.
+
+The values of all totals up to some limit are kept in one array of
+unsigned 16-bit ints, indexed by total and filled bottom up, so solving
+a position of any number of piles costs one lookup per pile, and finding
+the winning move at most one pass over the squares of one pile.
+"""
+from array import array
+from functools import reduce
+from math import isqrt
+from operator import xor
+from threading import RLock
+from strategy import Strategy
+from game_state import GameState
+from subtract_square_move import SubtractSquareMove
+from subtract_square_pile_move import SubtractSquarePileMove
+
+
+class GrundyTable:
+    """
+    Grundy values of Subtract Square totals, computed up to a limit that
+    grows on demand.
+
+    values: array of int -- values[t] is the Grundy value of total t
+    lock: RLock -- held while values is read or grown, so that threads may
+                   share self
+    """
+
+    def __init__(self):
+        """(GrundyTable) -> NoneType
+
+        Create a GrundyTable knowing only total 0.
+        """
+        self.values = array('H', [0])
+        self.lock = RLock()
+
+    def solve(self, limit):
+        """(GrundyTable, int) -> NoneType
+
+        Compute the value of every total up to limit.
+
+        >>> table = GrundyTable()
+        >>> table.solve(12)
+        >>> list(table.values)
+        [0, 1, 0, 1, 2, 0, 1, 0, 1, 2, 0, 1, 0]
+        """
+        with self.lock:
+            values = self.values
+            squares = [k * k for k in range(1, isqrt(limit) + 1)]
+            # seen[v] == total iff a total reachable from total has value
+            # v; a value is at most the number of squares
+            seen = [-1] * (len(squares) + 2)
+            count = 0   # the number of squares up to total
+            for total in range(len(values), limit + 1):
+                while count < len(squares) and squares[count] <= total:
+                    count += 1
+                for i in range(count):
+                    seen[values[total - squares[i]]] = total
+                value = 0
+                while seen[value] == total:
+                    value += 1
+                values.append(value)
+
+    def grundy(self, total):
+        """(GrundyTable, int) -> int
+
+        Return the Grundy value of total, computing the values up to twice
+        the largest total known if needed.
+
+        >>> GrundyTable().grundy(100)
+        4
+        """
+        with self.lock:
+            if total >= len(self.values):
+                self.solve(max(total, 2 * len(self.values)))
+            return self.values[total]
+
+
+# the table shared by every game, filled on demand
+_table = GrundyTable()
+
+
+def grundy_table():
+    """() -> GrundyTable
+
+    Return the GrundyTable shared by every game.
+    """
+    return _table
+
+
+def nim_sum(totals):
+    """(iterable of int) -> int
+
+    Return the XOR of the Grundy values of totals, which is 0 iff the
+    player to move loses.
+
+    >>> nim_sum([1, 4]), nim_sum([1, 3])
+    (3, 0)
+    """
+    return reduce(xor, [_table.grundy(total) for total in totals], 0)
+
+
+def winning_move(totals):
+    """(list of int) -> (int, int)
+
+    Return a (pile, amount) move from totals after which the nim sum is 0,
+    or None if the player to move loses.
+
+    >>> winning_move([4, 2])
+    (0, 4)
+    >>> winning_move([1, 3]) is None
+    True
+    """
+    target = nim_sum(totals)
+    if target == 0:
+        return None
+    for pile, total in enumerate(totals):
+        wanted = _table.grundy(total) ^ target
+        if wanted < _table.grundy(total):
+            # a total with each smaller value is reachable from total
+            for k in range(1, isqrt(total) + 1):
+                if _table.grundy(total - k * k) == wanted:
+                    return pile, k * k
+    return None
+
+
+def pile_totals(state):
+    """(GameState) -> list of int
+
+    Return the totals of the piles of state, a SubtractSquareState or a
+    SubtractSquarePilesState.
+    """
+    if hasattr(state, 'totals'):
+        return list(state.totals)
+    return [state.current_total]
+
+
+class StrategyGrundy(Strategy):
+    """
+    Interface to suggest optimal moves in Subtract Square, on one pile or
+    several, from Sprague-Grundy values instead of a search.
+    """
+
+    def __init__(self, interactive=False):
+        """(StrategyGrundy, bool) -> NoneType
+
+        Create new StrategyGrundy (self), prompt user if interactive.
+        """
+
+    def get_score(self, state):
+        """(StrategyGrundy, GameState) -> float
+
+        Return the score of state for the next player, WIN or LOSE.
+
+        >>> from subtract_square_piles_state import SubtractSquarePilesState
+        >>> StrategyGrundy().get_score(SubtractSquarePilesState(
+        ...     'p1', totals=(1, 3)))
+        -1.0
+        """
+        if nim_sum(pile_totals(state)) != 0:
+            return GameState.WIN
+        return GameState.LOSE
+
+    def root_score(self, state, move, control=None):
+        """(StrategyGrundy, GameState, Move, SearchControl) -> float
+
+        Return the score of move for the next player of state.
+
+        Overrides Strategy.root_score
+        """
+        return (-1) * self.get_score(state.apply_move(move))
+
+    def iter_deepening(self, state, control=None):
+        """(StrategyGrundy, GameState, SearchControl) -> generator of tuple
+
+        Yield the move of suggest_move, which needs no search, as final.
+
+        Overrides Strategy.iter_deepening
+        """
+        yield self.suggest_move(state), True
+
+    def suggest_move(self, state):
+        """(StrategyGrundy, GameState) -> Move
+
+        Return a move after which the opponent loses, or, if there is none,
+        the first legal move.
+
+        Overrides Strategy.suggest_move
+
+        >>> from subtract_square_piles_state import SubtractSquarePilesState
+        >>> state = SubtractSquarePilesState('p1', totals=(4, 2, 7))
+        >>> StrategyGrundy().suggest_move(state)
+        SubtractSquarePileMove(0, 4)
+        """
+        found = winning_move(pile_totals(state))
+        if found is None:
+            return next(state.iter_next_moves())
+        if hasattr(state, 'totals'):
+            return SubtractSquarePileMove(*found)
+        return SubtractSquareMove(found[1])
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,58 @@
+from subtract_square_move import SubtractSquareMove
+
+
+class SubtractSquarePileMove(SubtractSquareMove):
+    ''' A move in a game of Subtract Square played on several piles.
+
+    pile: int -- index of the pile to subtract from, counting from 0
+    amount: int -- amount to subtract from that pile
+    '''
+
+    def __init__(self, pile, amount):
+        ''' (SubtractSquarePileMove, int, int) -> NoneType
+
+        Initialize a new SubtractSquarePileMove removing amount from the
+        pile at index pile.
+
+        Assume: amount is a positive integer square.
+        '''
+        SubtractSquareMove.__init__(self, amount)
+        self.pile = pile
+
+    def __repr__(self):
+        ''' (SubtractSquarePileMove) -> str
+
+        Return a string representation of this SubtractSquarePileMove.
+
+        >>> SubtractSquarePileMove(1, 4)
+        SubtractSquarePileMove(1, 4)
+        '''
+        return 'SubtractSquarePileMove({}, {})'.format(self.pile, self.amount)
+
+    def __str__(self):
+        ''' (SubtractSquarePileMove) -> str
+
+        Return a string representation of this SubtractSquarePileMove
+        that is suitable for users to read.
+
+        >>> print(SubtractSquarePileMove(1, 4))
+        Remove 4 from pile 2
+        '''
+        # piles are numbered from 1 for the users
+        return 'Remove {} from pile {}'.format(self.amount, self.pile + 1)
+
+    def __eq__(self, other):
+        ''' (SubtractSquarePileMove, SubtractSquarePileMove) -> bool
+
+        Return True iff this SubtractSquarePileMove is the same as other.
+
+        >>> SubtractSquarePileMove(0, 4) == SubtractSquarePileMove(1, 4)
+        False
+        '''
+        return (isinstance(other, SubtractSquarePileMove) and
+                self.pile == other.pile and self.amount == other.amount)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,182 @@
+from game_state import GameState
+from subtract_square_pile_move import SubtractSquarePileMove
+from math import isqrt
+
+
+class SubtractSquarePilesState(GameState):
+    ''' The state of a game of Subtract Square played on several piles:
+    each move removes a positive square from one pile, and the player who
+    cannot move, as every pile is empty, loses.
+
+    totals: tuple of int   --- the total of each pile
+    '''
+
+    def __init__(self, p, interactive=False, totals=(0,)):
+        ''' (SubtractSquarePilesState, str, bool, tuple of int) -> NoneType
+
+        Initialize SubtractSquarePilesState self with the piles totals.
+
+        Assume:  every total is an int >= 0
+                 p in {'p1', 'p2'}
+        '''
+        if interactive:
+            from random import randint   # only needed to play interactively
+            piles = int(input('How many piles? '))
+            largest = int(input('Maximum starting value of a pile? '))
+            totals = [randint(1, largest) for i in range(piles)]
+        GameState.__init__(self, p)
+        self.totals = tuple(totals)
+        self.over = not any(self.totals)
+        self.instructions = ('On your turn, you may remove from one pile '
+                             'any number so long as it is (a) a perfect '
+                             'square, and (b) no more than the total of '
+                             'that pile.')
+
+    def __repr__(self):
+        ''' (SubtractSquarePilesState) -> str
+
+        Return a string representation of SubtractSquarePilesState self
+        that evaluates to an equivalent SubtractSquarePilesState
+
+        >>> SubtractSquarePilesState('p1', totals=(3, 5))
+        SubtractSquarePilesState('p1', totals=(3, 5))
+        '''
+        return 'SubtractSquarePilesState({}, totals={})'.format(
+            repr(self.next_player), repr(self.totals))
+
+    def __str__(self):
+        ''' (SubtractSquarePilesState) -> str
+
+        Return a convenient string representation of
+        SubtractSquarePilesState self.
+
+        >>> print(SubtractSquarePilesState('p1', totals=(3, 5)))
+        Piles: 3, 5; next player: p1
+        '''
+        return 'Piles: {}; next player: {}'.format(
+            ', '.join([str(total) for total in self.totals]),
+            self.next_player)
+
+    def __eq__(self, other):
+        ''' (SubtractSquarePilesState, SubtractSquarePilesState) -> bool
+
+        Return True iff this SubtractSquarePilesState is equivalent to other.
+
+        >>> s1 = SubtractSquarePilesState('p1', totals=(3, 5))
+        >>> s2 = SubtractSquarePilesState('p1', totals=[3, 5])
+        >>> s1 == s2
+        True
+        '''
+        return (isinstance(other, SubtractSquarePilesState) and
+                self.totals == other.totals and
+                self.next_player == other.next_player)
+
+    def apply_move(self, move):
+        ''' (SubtractSquarePilesState, SubtractSquarePileMove)
+        -> SubtractSquarePilesState
+
+        Return the new SubtractSquarePilesState reached by applying move to
+        self, or None if move is illegal.
+
+        >>> s1 = SubtractSquarePilesState('p1', totals=(3, 5))
+        >>> print(s1.apply_move(SubtractSquarePileMove(1, 4)))
+        Piles: 3, 1; next player: p2
+        '''
+        if self.is_legal(move):
+            totals = list(self.totals)
+            totals[move.pile] -= move.amount
+            return SubtractSquarePilesState(self.opponent(), totals=totals)
+        else:
+            return None
+
+    def rough_outcome(self):
+        '''(SubtractSquarePilesState) -> float
+
+        Return the outcome, WIN or LOSE, next_player can guarantee from
+        state self, which the Grundy values of the piles give exactly.
+
+        >>> SubtractSquarePilesState('p1', totals=(1, 3)).rough_outcome()
+        -1.0
+        '''
+        from subtract_square_grundy import nim_sum
+        if nim_sum(self.totals) != 0:
+            return SubtractSquarePilesState.WIN
+        return SubtractSquarePilesState.LOSE
+
+    def endgame_size(self):
+        '''(SubtractSquarePilesState) -> int
+
+        Return the sum of the totals, which bounds the number of moves left.
+
+        Overrides GameState.endgame_size
+        '''
+        return sum(self.totals)
+
+    def get_move(self):
+        '''(SubtractSquarePilesState) -> SubtractSquarePileMove
+
+        Prompt user and return move.
+        '''
+        pile = int(input('Remove from which pile? '))
+        # piles are numbered from 1 for the users
+        return SubtractSquarePileMove(pile - 1,
+                                      int(input('Remove how much? ')))
+
+    def winner(self, player):
+        ''' (SubtractSquarePilesState, str) -> bool
+
+        Return True iff the game is over and player has won.
+
+        >>> SubtractSquarePilesState('p2', totals=(0, 0)).winner('p1')
+        True
+
+        Preconditions: player is either 'p1' or 'p2'
+        '''
+        return self.over and self.opponent() == player
+
+    def possible_next_moves(self):
+        ''' (SubtractSquarePilesState) -> list of SubtractSquarePileMove
+
+        Return a (possibly empty) list of moves that are legal
+        from the present state.
+
+        >>> s1 = SubtractSquarePilesState('p1', totals=(3, 5))
+        >>> len(s1.possible_next_moves())
+        3
+        '''
+        return list(self.iter_next_moves())
+
+    def iter_next_moves(self):
+        ''' (SubtractSquarePilesState) -> generator of SubtractSquarePileMove
+
+        Yield the legal moves from the present state one at a time, pile by
+        pile, largest first.
+
+        >>> s1 = SubtractSquarePilesState('p1', totals=(3, 5))
+        >>> next(s1.iter_next_moves())
+        SubtractSquarePileMove(0, 1)
+        '''
+        for pile, total in enumerate(self.totals):
+            for i in range(isqrt(total), 0, -1):
+                yield SubtractSquarePileMove(pile, i * i)
+
+    def is_legal(self, move):
+        ''' (SubtractSquarePilesState, SubtractSquarePileMove) -> bool
+
+        Return whether move is legal from the present state.
+
+        >>> s1 = SubtractSquarePilesState('p1', totals=(3, 5))
+        >>> s1.is_legal(SubtractSquarePileMove(1, 4))
+        True
+        >>> s1.is_legal(SubtractSquarePileMove(0, 4))
+        False
+        '''
+        return (isinstance(move, SubtractSquarePileMove) and
+                0 <= move.pile < len(self.totals) and move.amount > 0 and
+                isqrt(move.amount) ** 2 == move.amount and
+                move.amount <= self.totals[move.pile])
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,225 @@
+"""
+Exact solution of Subtract Square for large totals.
+
+Whether the next player wins depends only on the current total, so the
+scores of all totals up to some limit fit in one byte each, in a dense
+array indexed by total. The array is filled bottom up, without recursion:
+a total is losing iff no square leads to a losing total, so each losing
+total marks every total a square above it as winning. Once the array
+would pass memory_limit bytes, the whole of it is copied into a
+memory-mapped temporary file and kept there from then on, so that RAM
+only holds the pages the operating system keeps cached.
+Growing the array replaces it, so threads sharing a solver read and grow
+it under a lock.
+NumPy, when installed, does the marking for a whole losing total at once.
+"""
+try:
+    import numpy as np
+except ImportError:   # NumPy only speeds the marking up
+    np = None
+
+from array import array
+from math import isqrt
+import mmap
+import tempfile
+from threading import RLock
+from game_state import GameState
+from strategy import Strategy
+from subtract_square_move import SubtractSquareMove
+
+LOSING, WINNING = 0, 1
+COPY_CHUNK = 1 << 20
+
+
+class SubtractSquareSolver:
+    """
+    Scores of Subtract Square totals, solved up to a limit that grows on
+    demand.
+
+    memory_limit: int -- largest number of bytes kept in RAM for scores
+    limit: int -- every total up to limit is solved
+    scores: bytearray or mmap -- scores[t] is LOSING or WINNING for total t
+    losing: array of int -- the losing totals up to limit, in order
+    lock: RLock -- held while scores is read or grown
+    """
+
+    def __init__(self, memory_limit=64 << 20):
+        """(SubtractSquareSolver, int) -> NoneType
+
+        Create a SubtractSquareSolver keeping at most memory_limit bytes of
+        scores in RAM.
+        """
+        self.memory_limit = memory_limit
+        self.limit = -1
+        self.scores = bytearray()
+        self.file = None
+        self.losing = array('q')
+        self.lock = RLock()
+
+    def grow(self, size):
+        """(SubtractSquareSolver, int) -> NoneType
+
+        Make self.scores hold size entries, the new ones WINNING only if a
+        known losing total is a square below them. If size passes
+        self.memory_limit, or the scores are already in a file, every score
+        is copied, chunk by chunk, into a new memory-mapped file of size
+        bytes, which replaces the old one.
+        """
+        old_size = len(self.scores)
+        if self.file is None and size <= self.memory_limit:
+            self.scores.extend(bytes(size - old_size))
+        else:
+            old_scores, old_file = self.scores, self.file
+            self.file = tempfile.TemporaryFile()
+            self.file.truncate(size)
+            self.scores = mmap.mmap(self.file.fileno(), size)
+            for start in range(0, old_size, COPY_CHUNK):
+                stop = min(start + COPY_CHUNK, old_size)
+                self.scores[start:stop] = old_scores[start:stop]
+            if old_file is not None:
+                old_scores.close()
+                old_file.close()
+        for total in self.losing:
+            self.mark(total, old_size, size - 1)
+
+    def mark(self, total, low, high):
+        """(SubtractSquareSolver, int, int, int) -> NoneType
+
+        Mark as WINNING every total in [low, high] that is a positive square
+        above the losing total.
+        """
+        first = isqrt(max(low - total - 1, 0)) + 1
+        last = isqrt(high - total)
+        if first > last:
+            return
+        if np is not None:
+            view = np.frombuffer(self.scores, dtype=np.uint8)
+            squares = np.arange(first, last + 1, dtype=np.int64)
+            view[total + squares * squares] = WINNING
+            del view   # a bytearray cannot grow while it is viewed
+        else:
+            scores = self.scores
+            for k in range(first, last + 1):
+                scores[total + k * k] = WINNING
+
+    def solve(self, limit):
+        """(SubtractSquareSolver, int) -> NoneType
+
+        Solve every total up to limit, holding self.lock.
+
+        >>> solver = SubtractSquareSolver()
+        >>> solver.solve(20)
+        >>> list(solver.losing)
+        [0, 2, 5, 7, 10, 12, 15, 17, 20]
+        """
+        with self.lock:
+            if limit <= self.limit:
+                return
+            self.grow(limit + 1)
+            total = self.scores.find(b'\x00', self.limit + 1)
+            while total != -1:
+                self.losing.append(total)
+                self.mark(total, total + 1, limit)
+                total = self.scores.find(b'\x00', total + 1)
+            self.limit = limit
+
+    def is_winning(self, total):
+        """(SubtractSquareSolver, int) -> bool
+
+        Return True iff the next player wins from total, solving more
+        totals if needed.
+
+        >>> SubtractSquareSolver().is_winning(1000000)
+        True
+        """
+        with self.lock:
+            if total > self.limit:
+                self.solve(max(total, 2 * self.limit))
+            return self.scores[total] == WINNING
+
+    def get_score(self, state):
+        """(SubtractSquareSolver, SubtractSquareState) -> float
+
+        Return the score of state for its next player, WIN or LOSE.
+        """
+        if self.is_winning(state.current_total):
+            return GameState.WIN
+        return GameState.LOSE
+
+    def best_move(self, state):
+        """(SubtractSquareSolver, SubtractSquareState) -> SubtractSquareMove
+
+        Return the first move, in the order of possible_next_moves, leading
+        to a losing total, or the first move if there is none.
+
+        >>> from subtract_square_state import SubtractSquareState
+        >>> state = SubtractSquareState('p1', current_total=8)
+        >>> SubtractSquareSolver().best_move(state)
+        SubtractSquareMove(1)
+        """
+        total = state.current_total
+        with self.lock:
+            self.is_winning(total)
+            for k in range(isqrt(total), 0, -1):
+                if self.scores[total - k * k] == LOSING:
+                    return SubtractSquareMove(k * k)
+        return SubtractSquareMove(isqrt(total) ** 2)
+
+    def close(self):
+        """(SubtractSquareSolver) -> NoneType
+
+        Release the memory-mapped file, if any.
+        """
+        with self.lock:
+            if self.file is not None:
+                self.scores.close()
+                self.file.close()
+                self.scores, self.file = bytearray(), None
+                self.limit, self.losing = -1, array('q')
+
+
+class StrategySubtractSquareSolver(Strategy):
+    """
+    Interface to suggest optimal Subtract Square moves from the table of
+    a SubtractSquareSolver.
+    """
+
+    def __init__(self, interactive=False, memory_limit=64 << 20):
+        """(StrategySubtractSquareSolver, bool, int) -> NoneType
+
+        Create new StrategySubtractSquareSolver (self), prompt user if
+        interactive.
+        """
+        self.solver = SubtractSquareSolver(memory_limit)
+
+    def get_score(self, state):
+        """(StrategySubtractSquareSolver, SubtractSquareState) -> float
+
+        Return the score of state for the next player.
+        """
+        return self.solver.get_score(state)
+
+    def iter_deepening(self, state, control=None):
+        """(StrategySubtractSquareSolver, SubtractSquareState,
+            SearchControl) -> generator of tuple
+
+        Yield the move of suggest_move, which needs no search, as final.
+
+        Overrides Strategy.iter_deepening
+        """
+        yield self.suggest_move(state), True
+
+    def suggest_move(self, state):
+        """(StrategySubtractSquareSolver, SubtractSquareState)
+        -> SubtractSquareMove
+
+        Return the first legal move leading to the highest score.
+
+        Overrides Strategy.suggest_move
+        """
+        return self.solver.best_move(state)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -1,7 +1,6 @@
 from game_state import GameState
 from subtract_square_move import SubtractSquareMove
-from math import sqrt
-from random import randint
+from math import sqrt, isqrt
 
 
 class SubtractSquareState(GameState):
@@ -20,6 +19,7 @@ class SubtractSquareState(GameState):
                         p in {'p1', 'p2'}
         '''
         if interactive:
+            from random import randint   # only needed to play interactively
             current_total = randint(1, int(input('Maximum starting value? ')))
         GameState.__init__(self, p)
         self.current_total = current_total
@@ -77,7 +77,7 @@ class SubtractSquareState(GameState):
         >>> print(s2)
         Current total: 8; next player: p2
         '''
-        if move in self.possible_next_moves():
+        if self.is_legal(move):
             new_total = self.current_total - move.amount
             return SubtractSquareState(self.opponent(),
                                        current_total=new_total)
@@ -102,12 +102,21 @@ class SubtractSquareState(GameState):
         if is_pos_square(self.current_total):
             return SubtractSquareState.WIN
         elif all([is_pos_square(self.current_total - n**2)
-                  for n in range(1, self.current_total + 1)
+                  for n in range(1, isqrt(self.current_total) + 1)
                   if n**2 < self.current_total]):
             return SubtractSquareState.LOSE
         else:
             return SubtractSquareState.DRAW
 
+    def endgame_size(self):
+        '''(SubtractSquareState) -> int
+
+        Return the current total, which bounds the number of moves left.
+
+        Overrides GameState.endgame_size
+        '''
+        return self.current_total
+
     def get_move(self):
         '''(SubtractSquareState) -> SubtractSquareMove
 
@@ -144,9 +153,35 @@ class SubtractSquareState(GameState):
         >>> len(L1) == len(L2) and all([m in L2 for m in L1])
         True
         '''
-        return [SubtractSquareMove(i**2)
-                for i in range(self.current_total, 0, -1)
-                if i*i <= self.current_total]
+        return list(self.iter_next_moves())
+
+    def iter_next_moves(self):
+        ''' (SubtractSquareState) -> generator of SubtractSquareMove
+
+        Yield the legal moves from the present state one at a time, largest
+        first.
+
+        >>> s1 = SubtractSquareState('p1', current_total=10)
+        >>> next(s1.iter_next_moves())
+        SubtractSquareMove(9)
+        '''
+        for i in range(isqrt(self.current_total), 0, -1):
+            yield SubtractSquareMove(i * i)
+
+    def is_legal(self, move):
+        ''' (SubtractSquareState, SubtractSquareMove) -> bool
+
+        Return whether move is legal from the present state.
+
+        >>> s1 = SubtractSquareState('p1', current_total=10)
+        >>> s1.is_legal(SubtractSquareMove(9))
+        True
+        >>> s1.is_legal(SubtractSquareMove(8))
+        False
+        '''
+        return (isinstance(move, SubtractSquareMove) and
+                is_pos_square(move.amount) and
+                move.amount <= self.current_total)
 
 
 def is_pos_square(n):
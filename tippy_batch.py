@@ -0,0 +1,127 @@
+"""
+Vectorized evaluation of many Tippy grids at once.
+
+A batch is a NumPy int8 array of shape (N, d, d) in which each cell holds
+CODES[player] if that player has taken it and EMPTY otherwise. NumPy is
+optional: available() is False when it is not installed, and callers fall
+back to the pure Python functions in tippy_state.
+"""
+try:
+    import numpy as np
+except ImportError:   # NumPy is only needed for batched evaluation
+    np = None
+
+from game_state import GameState
+from tippy_pattern import SHAPES, all_orientations
+
+EMPTY = 0
+CODES = {'p1': 1, 'p2': -1}
+
+
+def available():
+    """() -> bool
+
+    Return True iff NumPy is installed, so that batches can be evaluated.
+    """
+    return np is not None
+
+
+def encode_grids(grids):
+    """(list of list of lists) -> numpy.ndarray
+
+    Return the batch of shape (N, d, d) encoding the N grids of the same
+    dimension d, in the format of TippyGameState.grid.
+
+    >>> encode_grids([[['p1', 0, 0], [0, 'p2', 0], [0, 0, 0]]])[0, :2]
+    array([[ 1,  0,  0],
+           [ 0, -1,  0]], dtype=int8)
+    """
+    return np.array([[[CODES.get(cell, EMPTY) for cell in row]
+                      for row in grid] for grid in grids], dtype=np.int8)
+
+
+def window_counts(boards, values, shapes=SHAPES):
+    """(numpy.ndarray, numpy.ndarray, tuple of shapes)
+    -> list of (int, numpy.ndarray)
+
+    Return, for each orientation of shapes that fits on the boards, its
+    number of cells and an array of shape (N, rows, columns) counting the
+    cells equal to values[n] in that orientation placed with its top left
+    corner at (row, column) of board n.
+    """
+    dimension = boards.shape[1]
+    matches = boards == values.reshape(-1, 1, 1)
+    result = []
+    for offsets in all_orientations(shapes):
+        height = max(r for r, c in offsets) + 1
+        width = max(c for r, c in offsets) + 1
+        if height > dimension or width > dimension:
+            continue
+        rows, columns = dimension - height + 1, dimension - width + 1
+        count = np.zeros((boards.shape[0], rows, columns), dtype=np.int8)
+        for r, c in offsets:
+            count += matches[:, r:r + rows, c:c + columns]
+        result.append((len(offsets), count))
+    return result
+
+
+def batch_contain_tippy(boards, values, shapes=SHAPES):
+    """(numpy.ndarray, numpy.ndarray, tuple of shapes) -> numpy.ndarray
+
+    Return a boolean array whose entry n is True iff board n contains one
+    of shapes formed by the player with code values[n].
+
+    >>> boards = encode_grids([[['p1', 'p1', 'p2'], ['p2', 'p1', 'p1'],
+    ...                         ['p2', 0, 0]]] * 2)
+    >>> batch_contain_tippy(boards, np.array([1, -1], dtype=np.int8))
+    array([ True, False])
+    """
+    found = np.zeros(boards.shape[0], dtype=bool)
+    for size, count in window_counts(boards, values, shapes):
+        found |= (count == size).any(axis=(1, 2))
+    return found
+
+
+def batch_rough_outcome(boards, values, shapes=SHAPES):
+    """(numpy.ndarray, numpy.ndarray, tuple of shapes) -> numpy.ndarray
+
+    Return a float array whose entry n is the rough outcome, as defined by
+    TippyGameState.rough_outcome, of board n for the next player, whose
+    code is values[n].
+
+    >>> boards = encode_grids([[['p2', 'p2', 'p1'], ['p1', 'p2', 'p2'],
+    ...                         ['p1', 0, 0]],
+    ...                        [[0, 'p1', 'p2'], ['p2', 'p1', 'p1'],
+    ...                         ['p2', 0, 0]]])
+    >>> batch_rough_outcome(boards, np.array([1, 1], dtype=np.int8))
+    array([-1.,  1.])
+    """
+    empties = boards == EMPTY
+    has_move = empties.any(axis=(1, 2))
+    lost = batch_contain_tippy(boards, -values, shapes)
+    # a move wins iff it completes a tippy, or one is already on the board
+    won = batch_contain_tippy(boards, values, shapes) & has_move
+    empty_counts = window_counts(boards, np.zeros_like(values), shapes)
+    for (size, count), (_, empty) in zip(
+            window_counts(boards, values, shapes), empty_counts):
+        won |= ((count == size - 1) & (empty == 1)).any(axis=(1, 2))
+    return np.where(lost, GameState.LOSE,
+                    np.where(won, GameState.WIN, GameState.DRAW))
+
+
+def rough_outcomes(states):
+    """(list of TippyGameState) -> list of float
+
+    Return [s.rough_outcome() for s in states], computed in one batch.
+    All states must have the same dimension and winning shapes.
+    """
+    if not states:
+        return []
+    boards = encode_grids([s.grid for s in states])
+    values = np.array([CODES[s.next_player] for s in states], dtype=np.int8)
+    return batch_rough_outcome(boards, values, states[0].SHAPES).tolist()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,171 @@
+"""
+Winning shapes of Tippy described as data.
+
+A shape is a tuple of (row, column) offsets of its cells. Every rotation
+and reflection of a shape wins, so each shape is expanded once into its
+distinct orientations. A PatternIndex places those orientations at every
+position of a grid and maps each cell to the pattern instances through it,
+so detecting a new tippy after a move only examines the instances through
+the cell that changed.
+"""
+
+# the tippy of the A2 instructions; its orientations are the other tippies
+TIPPY = ((0, 0), (0, 1), (1, 1), (1, 2))
+SHAPES = (TIPPY,)
+
+
+def normalize(cells):
+    """(iterable of 2-tuple of int) -> tuple of 2-tuple of int
+
+    Return cells shifted so that their smallest row and column are 0,
+    in sorted order.
+
+    >>> normalize([(2, 3), (1, 4)])
+    ((0, 1), (1, 0))
+    """
+    cells = list(cells)
+    top = min(r for r, c in cells)
+    left = min(c for r, c in cells)
+    return tuple(sorted((r - top, c - left) for r, c in cells))
+
+
+def orientations(shape):
+    """(tuple of 2-tuple of int) -> list of tuple of 2-tuple of int
+
+    Return the distinct normalized rotations and reflections of shape.
+
+    >>> len(orientations(TIPPY))
+    4
+    >>> len(orientations(((0, 0), (0, 1), (1, 0), (1, 1))))
+    1
+    """
+    result = []
+    cells = shape
+    for i in range(4):
+        cells = [(c, -r) for r, c in cells]   # rotate by a quarter turn
+        for image in (cells, [(r, -c) for r, c in cells]):
+            image = normalize(image)
+            if image not in result:
+                result.append(image)
+    return sorted(result)
+
+
+def all_orientations(shapes=SHAPES):
+    """(tuple of shapes) -> list of tuple of 2-tuple of int
+
+    Return the distinct orientations of all the shapes in shapes.
+    """
+    result = []
+    for shape in shapes:
+        for image in orientations(shape):
+            if image not in result:
+                result.append(image)
+    return result
+
+
+class PatternIndex:
+    """
+    Every placement of the orientations of some shapes on a square grid.
+
+    dimension: int -- number of rows and columns of the grid
+    instances: list of tuple of 2-tuple of int -- cells of each placement
+    through: list of lists -- through[r][c] is the list of the instances
+                              containing cell (r, c), each given as the
+                              tuple of its other cells
+    """
+
+    def __init__(self, dimension, shapes=SHAPES):
+        """(PatternIndex, int, tuple of shapes) -> NoneType
+
+        Build the PatternIndex of shapes on a grid of dimension rows and
+        columns.
+
+        >>> len(PatternIndex(3).instances)
+        8
+        """
+        self.dimension = dimension
+        self.instances = []
+        self.through = [[[] for c in range(dimension)]
+                        for r in range(dimension)]
+        for offsets in all_orientations(shapes):
+            height = max(r for r, c in offsets) + 1
+            width = max(c for r, c in offsets) + 1
+            for top in range(dimension - height + 1):
+                for left in range(dimension - width + 1):
+                    cells = tuple((top + r, left + c) for r, c in offsets)
+                    self.instances.append(cells)
+                    for cell in cells:
+                        others = tuple(x for x in cells if x != cell)
+                        self.through[cell[0]][cell[1]].append(others)
+
+    def contains(self, p, grid):
+        """(PatternIndex, str, list of lists) -> bool
+
+        Return True iff every cell of some instance in grid is p.
+
+        >>> grid = [['p2', 'p2', 'p1'], [0, 'p1', 'p1'], [0, 'p1', 'p2']]
+        >>> PatternIndex(3).contains('p1', grid)
+        True
+        """
+        return any(all(grid[r][c] == p for r, c in cells)
+                   for cells in self.instances)
+
+    def completes(self, p, grid, position):
+        """(PatternIndex, str, list of lists, 2-tuple of int) -> bool
+
+        Return True iff placing p at position, whatever is there now,
+        makes every cell of some instance through position p.
+
+        >>> grid = [['p1', 'p1', 0], [0, 0, 'p1'], [0, 0, 0]]
+        >>> PatternIndex(3).completes('p1', grid, (1, 1))
+        True
+        >>> PatternIndex(3).completes('p1', grid, (2, 2))
+        False
+        """
+        return any(all(grid[r][c] == p for r, c in others)
+                   for others in self.through[position[0]][position[1]])
+
+    def open_counts(self, p, grid):
+        """(PatternIndex, str, list of lists) -> list of int
+
+        Return the list whose item k is the number of instances with k
+        cells p and every other cell empty, which p could still complete.
+
+        >>> grid = [['p1', 'p1', 0], [0, 0, 'p2'], [0, 0, 0]]
+        >>> PatternIndex(3).open_counts('p1', grid)
+        [1, 3, 0, 0, 0]
+        """
+        counts = [0] * (max(len(cells) for cells in self.instances) + 1)
+        for cells in self.instances:
+            filled = 0
+            for r, c in cells:
+                if grid[r][c] == p:
+                    filled += 1
+                elif grid[r][c] != 0:
+                    break
+            else:
+                counts[filled] += 1
+        return counts
+
+
+_indexes = {}
+
+
+def pattern_index(dimension, shapes=SHAPES):
+    """(int, tuple of shapes) -> PatternIndex
+
+    Return the PatternIndex of shapes on a grid of dimension rows and
+    columns, building it only the first time it is asked for.
+
+    >>> pattern_index(4) is pattern_index(4)
+    True
+    """
+    key = (dimension, shapes)
+    if key not in _indexes:
+        _indexes[key] = PatternIndex(dimension, shapes)
+    return _indexes[key]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -1,5 +1,6 @@
 from game_state import GameState
 from tippy_move import TippyMove
+from tippy_pattern import SHAPES, pattern_index
 
 
 class TippyGameState(GameState):
@@ -13,7 +14,11 @@ class TippyGameState(GameState):
                               cross or circle) by player1,'p2' if it is
                               placed by player2, and 0 if nothing is at that
                               position.
+    SHAPES: tuple of shapes --- the winning shapes, as in tippy_pattern;
+                                a subclass may override it to play a
+                                variant with other shapes
     """
+    SHAPES = SHAPES
 
     def __init__(self, p, interactive=False, dimension=3):
         """(TippyGameState, str, bool, int -> NoneType
@@ -77,7 +82,12 @@ class TippyGameState(GameState):
     def apply_move(self, move):
         """(TippyGameState, TippyMove) -> TippyGameState
 
-        Return the new TippyState reached by applying move to self.
+        Return the new TippyState reached by applying move to self. Only
+        the tippies through the new placeholder are looked for, so a tippy
+        already in self.grid does not end the new state.
+
+        Precondition: self.grid holds no tippy of either player, as is the
+        case when self is not over; a grid set by hand must satisfy it.
 
         >>> t1 = TippyState('p2')
         >>> t2 = t1.apply_move(TippyMove((0, 0)))
@@ -86,8 +96,8 @@ class TippyGameState(GameState):
         >>> t2.next_player
         'p2'
         """
-        if move in self.possible_next_moves():
-            result = TippyGameState(self.opponent(), 
+        if self.is_legal(move):
+            result = self.__class__(self.opponent(),
                                     dimension=self.dimension)
             row = move.position[0]
             col = move.position[1]
@@ -95,10 +105,10 @@ class TippyGameState(GameState):
             # we do this because the sublists of self.grid are mutable
             new_grid[row][col] = self.next_player
             result.grid = new_grid
-            result.over = (True if (result.possible_next_moves() == [] or
-                                    contain_tippy('p1', new_grid) or
-                                    contain_tippy('p2', new_grid))
-                           else False)
+            # only a tippy through the new placeholder can be new
+            result.over = (not any(0 in x for x in new_grid) or
+                           self.pattern_index().completes(
+                               self.next_player, new_grid, move.position))
             return result
         else:
             return None
@@ -117,14 +127,29 @@ class TippyGameState(GameState):
         >>> t1.rough_outcome()
         1.0
         """
-        if contain_tippy(self.opponent(), self.grid):
+        index = self.pattern_index()
+        moves = self.possible_next_moves()
+        if index.contains(self.opponent(), self.grid):
             return TippyGameState.LOSE
-        elif any([contain_tippy(self.next_player, self.apply_move(x).grid)
-                  for x in self.possible_next_moves()]):
+        elif moves and (index.contains(self.next_player, self.grid) or
+                        any([index.completes(self.next_player, self.grid,
+                                             x.position) for x in moves])):
             return TippyGameState.WIN
         else:
             return TippyGameState.DRAW
             
+    def endgame_size(self):
+        """(TippyGameState) -> int
+
+        Return the number of empty positions left on the grid.
+
+        Overrides GameState.endgame_size
+
+        >>> TippyGameState('p1').endgame_size()
+        9
+        """
+        return sum([row.count(0) for row in self.grid])
+
     def get_move(self):
         """(TippyGameState) -> TippyMove
 
@@ -149,7 +174,14 @@ class TippyGameState(GameState):
 
         Precondition: player in ['p1', 'p2']
         """
-        return contain_tippy(player, self.grid)
+        return self.pattern_index().contains(player, self.grid)
+
+    def pattern_index(self):
+        """(TippyGameState) -> PatternIndex
+
+        Return the PatternIndex of the winning shapes on the grid of self.
+        """
+        return pattern_index(self.dimension, self.SHAPES)
 
     def possible_next_moves(self):
         """(TippyGameState) -> list of TippyMove
@@ -161,14 +193,42 @@ class TippyGameState(GameState):
         >>> len(t.possible_next_moves())
         25
         """
-        result = []
+        return list(self.iter_next_moves())
+
+    def iter_next_moves(self):
+        """(TippyGameState) -> generator of TippyMove
+
+        Yield the legal moves from the present state one at a time, row by
+        row.
+
+        >>> t = TippyGameState('p1', dimension = 5)
+        >>> next(t.iter_next_moves())
+        TippyMove((0, 0))
+        """
         for i in range(self.dimension):
             for j in range(self.dimension):
                 if self.grid[i][j] == 0:
-                    result.append(TippyMove((i, j)))
-        return result
+                    yield TippyMove((i, j))
+
+    def is_legal(self, move):
+        """(TippyGameState, TippyMove) -> bool
+
+        Return True iff move places a placeholder on an empty position of
+        the grid.
+
+        >>> t = TippyGameState('p1')
+        >>> t.is_legal(TippyMove((2, 2))), t.is_legal(TippyMove((3, 0)))
+        (True, False)
+        """
+        if not isinstance(move, TippyMove):
+            return False
+        row, col = move.position
+        return (0 <= row < self.dimension and 0 <= col < self.dimension and
+                self.grid[row][col] == 0)
     
 # some helper functions:
+# contain_tippy uses the pattern index of tippy_pattern; the functions below
+# are the original scan, kept as a reference implementation.
 # let's call the first tippy in A2 instruction type1 tippy;
 # it can be shown that a grid contains a tippy iff one of the following holds:
 # 1. It contains a type1 tippy
@@ -236,15 +296,16 @@ def check_type1_tippy(p, grid):
     return False
 
 
-def contain_tippy(p, grid):
+def contain_tippy_by_transformations(p, grid):
     """(str, list of lists) -> bool
 
-    Return True iff grid contains a tippy formed by p
+    Return True iff grid contains a tippy formed by p, by looking for a
+    type1 tippy in grid and in its transformations.
 
     Assume for this assignment p in ['p1', 'p2']
 
     >>> grid = [['p2', 'p2', 'p1'], [0, 'p1', 'p1'], [0, 'p1', 'p2']]
-    >>> contain_tippy('p1', grid)
+    >>> contain_tippy_by_transformations('p1', grid)
     True
     """
 
@@ -252,5 +313,18 @@ def contain_tippy(p, grid):
             check_type1_tippy(p, transpose(grid)) or
             check_type1_tippy(p, reflection(grid)) or
             check_type1_tippy(p, reflection(transpose(grid))))
-        
 
+
+def contain_tippy(p, grid, shapes=SHAPES):
+    """(str, list of lists, tuple of shapes) -> bool
+
+    Return True iff grid contains one of shapes, in any orientation,
+    formed by p
+
+    Assume for this assignment p in ['p1', 'p2']
+
+    >>> grid = [['p2', 'p2', 'p1'], [0, 'p1', 'p1'], [0, 'p1', 'p2']]
+    >>> contain_tippy('p1', grid)
+    True
+    """
+    return pattern_index(len(grid), shapes).contains(p, grid)
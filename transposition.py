@@ -0,0 +1,103 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class TranspositionTable:
+    """
+    Cache of search results keyed by position, optionally bounded in size.
+    When the table is full, the entry stored least recently is evicted.
+    A table may be shared by searches running in several threads: every
+    access holds self.lock, and each entry is replaced as a whole.
+
+    EXACT, LOWER, UPPER: int -- flags telling whether a stored score is
+                                the exact score of a position, a lower
+                                bound or an upper bound of it
+    max_size: int or None -- largest number of entries kept, or None
+    hits, misses: int -- number of lookups by get that found an entry,
+                         and that did not
+    """
+    EXACT, LOWER, UPPER = 0, 1, 2
+
+    def __init__(self, max_size=None):
+        """(TranspositionTable, int) -> NoneType
+
+        Create an empty TranspositionTable holding at most max_size
+        entries, or any number of entries if max_size is None.
+        """
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = Lock()
+        self.hits, self.misses = 0, 0
+
+    def __len__(self):
+        """(TranspositionTable) -> int
+
+        Return the number of entries in self.
+        """
+        return len(self.entries)
+
+    def __contains__(self, key):
+        """(TranspositionTable, object) -> bool
+
+        Return True iff self has an entry for key.
+        """
+        with self.lock:
+            return key in self.entries
+
+    def __getitem__(self, key):
+        """(TranspositionTable, object) -> object
+
+        Return the entry for key; raise KeyError if there is none.
+        """
+        with self.lock:
+            return self.entries[key]
+
+    def __setitem__(self, key, value):
+        """(TranspositionTable, object, object) -> NoneType
+
+        Store value as the entry for key, evicting the oldest entry if
+        self is full.
+
+        >>> table = TranspositionTable(2)
+        >>> table['a'], table['b'], table['c'] = 1, 2, 3
+        >>> 'a' in table, len(table)
+        (False, 2)
+        """
+        with self.lock:
+            if key in self.entries:
+                del self.entries[key]
+            elif (self.max_size is not None and
+                  len(self.entries) >= self.max_size):
+                self.entries.popitem(last=False)
+            self.entries[key] = value
+
+    def get(self, key, default=None):
+        """(TranspositionTable, object, object) -> object
+
+        Return the entry for key, or default if there is none, counting
+        the lookup in self.hits or self.misses.
+
+        >>> table = TranspositionTable()
+        >>> table['a'] = 1
+        >>> table.get('a'), table.get('b'), table.hits, table.misses
+        (1, None, 1, 1)
+        """
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return default
+
+    def clear(self):
+        """(TranspositionTable) -> NoneType
+
+        Remove every entry of self.
+        """
+        with self.lock:
+            self.entries.clear()
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()